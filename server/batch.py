@@ -0,0 +1,264 @@
+"""Syncs many accounts in one process for scheduled refreshes
+
+Reads one JSON account per line from a file or stdin:
+
+    {"id": "...", "school": "bellarmine", "username": "...", "password": "...",
+     "data_if_locked": [], "term_data_if_locked": {}, "get_history": false, "stored_terms": ["22-23"],
+     "lane": "interactive", "deadline": 60, "graderoom_username": "...", "series": {},
+     "series_weights": {"weights": {}, "addedWeights": {}}, "partial": false}
+
+Each school host gets its own thread pool sized to its concurrency
+limit, so a backlog for one school never holds up another. All
+sessions for a host share one connection pool, so connections stay
+warm across accounts. Each result is written to stdout as a JSON line
+tagged with the account id as soon as that account finishes.
+
+With --capacity, it runs as a long-lived worker: accounts keep being
+read from stdin and every request waits for a slot from a
+PriorityScheduler with that many slots. Jobs go to the lane given in
+the account, or the history lane for history imports and the
+interactive lane otherwise. Each lane gets its own threads, so a
+queue of imports never delays an interactive sync from starting.
+Without a lane in the account, a sync whose login shows PowerSchool is
+locked sends its locked mode requests in the background lane.
+
+With --catalog, PowerSchool classes get their catalog data attached
+from a lookup table written by catalog_to_json.py. The table is
+memory-mapped once and shared by every sync.
+
+With --mongo, the grades of accounts that have a graderoom_username
+are stored in that user's document by a MongoSink, the same way Node
+stores a result, and only a summary of the write is sent to stdout. DB_URL and DB_NAME select the database.
+
+With --parse-workers N, PowerSchool class pages are parsed in a pool
+of N processes shared by every sync, while the sync's thread keeps
+requesting the next pages. Parsing then no longer holds this process's
+GIL, so it scales across cores.
+
+With SCRAPE_BASE_URL set, every request goes to that server instead,
+like the load test stand-in in benchmarks/stand_in.py.
+
+Accounts with "partial": true get the classes that were scraped when
+other classes fail or the deadline passes, marked "partial": true.
+Otherwise such a sync fails as a whole.
+
+Accounts with a series field get running-grade series for the charts
+sent with their result, continued from the given series of their last
+result. series_weights holds the user's stored weights and addedWeights
+the series are charted with. See grade_series.py.
+
+With --export-columns path, the assignments of every successful result
+are also collected into columns and written once all accounts are
+synced, as a directory of .npy files or a Parquet file if path ends in
+.parquet. See grade_columns.py. Accounts written to MongoDB by --mongo
+are not exported.
+
+With --low-memory, parsed pages are freed as soon as their data is
+extracted, and with --memory-limit N, a sync that finds the process
+using more than N MiB stops with a structured error instead of
+growing until the host runs out of memory.
+
+Usage: python server/batch.py [accounts.jsonl] [--limit school=N ...] [--progress] [--capacity N]
+                              [--catalog catalog_lookup.bin] [--mongo] [--low-memory] [--memory-limit N]
+                              [--parse-workers N] [--export-columns path]
+"""
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from catalog_lookup import CatalogLookup
+from mongo_sink import MongoSink, database_from_env
+from scheduler import PriorityScheduler
+from scrape import Deadline, base_url_adapter, json_format, sync_account
+
+# Simultaneous syncs allowed against each school's host
+default_limits = {"ndsj": 4, "bellarmine": 8, "basis": 4}
+
+
+class BatchSync:
+    def __init__(self, limits: dict or None = None, progress: bool = False, out=sys.stdout,
+                 scheduler: PriorityScheduler or None = None, catalog: CatalogLookup or None = None,
+                 database=None, low_memory: bool = False, memory_limit: float or None = None,
+                 parse_pool: ProcessPoolExecutor or None = None,
+                 columns: 'grade_columns.ColumnWriter' or None = None) -> None:
+        """
+        Args:
+            limits: maximum simultaneous syncs per school, per lane when scheduled
+            progress: also stream progress messages, not just results
+            out: file results are written to
+            scheduler: gives out request slots by lane, if any
+            catalog: catalog lookup table for PowerSchool classes, if any
+            database: pymongo database grades are written to, if any
+            low_memory: free parsed pages as soon as their data is extracted
+            memory_limit: MiB the process may use before a sync is stopped, if any
+            parse_pool: processes PowerSchool pages are parsed in, if any
+            columns: collects the assignments of every successful result, if any
+        """
+        self.limits = dict(default_limits, **(limits or {}))
+        self.progress = progress
+        self.out = out
+        self.scheduler = scheduler
+        self.catalog = catalog
+        self.database = database
+        self.low_memory = low_memory
+        self.memory_limit = memory_limit
+        self.parse_pool = parse_pool
+        self.columns = columns
+        self._out_lock = threading.Lock()
+        base_url = os.getenv("SCRAPE_BASE_URL")
+        self._adapters = {school: base_url_adapter(base_url, pool_connections=4, pool_maxsize=limit) if base_url
+                          else HTTPAdapter(pool_connections=4, pool_maxsize=limit)
+                          for school, limit in self.limits.items()}
+
+    def session(self, school: str) -> requests.Session:
+        """Returns a new session that shares the school's connection pool"""
+        session = requests.Session()
+        adapter = self._adapters.get(school)
+        if adapter is not None:
+            session.mount("https://", adapter)
+        return session
+
+    def write(self, account_id, line: str) -> bool:
+        """Writes a scraper line tagged with its account id
+
+        Returns:
+            True if the line was the account's result
+        """
+        message = json.loads(line)
+        is_result = 'success' in message
+        if is_result or self.progress:
+            with self._out_lock:
+                self.out.write(json.dumps({'id': account_id, **message}) + "\n")
+                self.out.flush()
+                if is_result and self.columns is not None and message['success'] and 'new_grades' in message:
+                    self.columns.add(message['new_grades'], account_id)
+        return is_result
+
+    @staticmethod
+    def lane(account: dict) -> str:
+        if account.get('lane'):
+            return account['lane']
+        return 'history' if account.get('get_history') else 'interactive'
+
+    def sync(self, account: dict) -> None:
+        account_id = account.get('id')
+        school = account['school']
+        finished = False
+        options = {'low_memory': self.low_memory, 'memory_limit': self.memory_limit}
+        if self.scheduler is not None:
+            options.update(scheduler=self.scheduler, lane=self.lane(account))
+            if not account.get('lane'):
+                # Whether PowerSchool is locked is only known after login
+                options['locked_lane'] = 'background'
+        if account.get('partial'):
+            # Return the classes that were scraped when others fail or the deadline passes
+            options['partial_results'] = True
+        if account.get('deadline'):
+            # Seconds the sync may take, counted from when it starts rather than when it was queued
+            options['deadline'] = Deadline(float(account['deadline']))
+        if self.catalog is not None and school != "basis":
+            options['catalog'] = self.catalog
+        if self.parse_pool is not None and school != "basis":
+            options['parse_pool'] = self.parse_pool
+        if account.get('series') is not None:
+            options['series'] = account['series']
+            options['series_weights'] = account.get('series_weights')
+        if self.database is not None and account.get('graderoom_username'):
+            options['sink'] = MongoSink(self.database, account['graderoom_username'])
+
+        def emit(line: str) -> None:
+            nonlocal finished
+            finished = self.write(account_id, line) or finished
+
+        try:
+            sync_account(school, account['username'], account['password'], account.get('data_if_locked', []),
+                         account.get('term_data_if_locked', {}), bool(account.get('get_history', False)),
+                         emit, self.session(school), set(account.get('stored_terms', ())) or None, **options)
+        except SystemExit:
+            # Login failures emit their result and then exit
+            pass
+        except Exception as e:
+            emit(json_format(False, f"Error: {str(e)}"))
+
+        if not finished:
+            self.write(account_id, json_format(False, 'Something went wrong.'))
+
+    def run(self, accounts) -> None:
+        """Syncs every account from an iterable of account dicts"""
+        with ExitStack() as stack:
+            executors = {}
+            for account in accounts:
+                school = account.get('school')
+                key = (school, self.lane(account) if self.scheduler is not None else None)
+                if key not in executors:
+                    executor = ThreadPoolExecutor(max_workers=self.limits.get(school, 1))
+                    executors[key] = stack.enter_context(executor)
+                executors[key].submit(self.sync, account)
+
+
+def read_accounts(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    limits = {}
+    while "--limit" in args:
+        i = args.index("--limit")
+        school, limit = args[i + 1].split("=")
+        limits[school] = int(limit)
+        del args[i:i + 2]
+    capacity = None
+    if "--capacity" in args:
+        i = args.index("--capacity")
+        capacity = int(args[i + 1])
+        del args[i:i + 2]
+    catalog = None
+    if "--catalog" in args:
+        i = args.index("--catalog")
+        catalog = CatalogLookup(args[i + 1])
+        del args[i:i + 2]
+    show_progress = "--progress" in args
+    memory_limit = None
+    if "--memory-limit" in args:
+        i = args.index("--memory-limit")
+        memory_limit = float(args[i + 1])
+        del args[i:i + 2]
+    parse_pool = None
+    if "--parse-workers" in args:
+        i = args.index("--parse-workers")
+        parse_pool = ProcessPoolExecutor(int(args[i + 1]))
+        del args[i:i + 2]
+    export_path = None
+    columns = None
+    if "--export-columns" in args:
+        # numpy is only needed when exporting
+        from grade_columns import ColumnWriter
+
+        i = args.index("--export-columns")
+        export_path = args[i + 1]
+        del args[i:i + 2]
+        columns = ColumnWriter()
+    database = database_from_env() if "--mongo" in args else None
+    low_memory = "--low-memory" in args
+    args = [arg for arg in args if arg not in ("--progress", "--mongo", "--low-memory")]
+
+    batch = BatchSync(limits, show_progress, scheduler=PriorityScheduler(capacity) if capacity else None,
+                      catalog=catalog, database=database, low_memory=low_memory, memory_limit=memory_limit,
+                      parse_pool=parse_pool, columns=columns)
+    if args and args[0] != "-":
+        with open(args[0]) as f:
+            batch.run(read_accounts(f))
+    else:
+        batch.run(read_accounts(sys.stdin))
+    if export_path:
+        batch.columns.write(export_path)
@@ -0,0 +1,53 @@
+"""Compares memory held by assignment records against per-assignment dicts
+
+Simulates a history sync of a multi-year student and measures the
+memory kept alive until the result is serialized, once with the
+slotted records and once with the dictionaries the scraper used to
+keep (the stripped assignment plus the as_dict copy of it).
+
+Usage: python server/benchmarks/bench_assignment_memory.py [years] [classes] [assignments]
+"""
+import sys
+import tracemalloc
+
+import synthetic
+from scrape import PowerSchoolClassGrade, parse_ps_class
+
+
+def build_history(years: int, classes: int, assignments: int) -> list:
+    history = []
+    for year in range(years):
+        for semester in range(2):
+            for c in range(classes):
+                local_class = PowerSchoolClassGrade(f"Class {c}", "Teacher", 95.0, "A", "1", str(c), False)
+                raw = synthetic.powerschool_response(assignments, 2020 + year, seed=year * 100 + semester * 10 + c)
+                history.append(parse_ps_class(local_class, raw))
+    return history
+
+
+def as_dicts(history: list) -> list:
+    """The representation kept before records: one dict per assignment"""
+    return [local_class.as_dict() for local_class in history]
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    held = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    years, classes, assignments = (args + [4, 7, 60][len(args):])[:3]
+    total = years * 2 * classes * assignments
+
+    record_bytes = measure(lambda: build_history(years, classes, assignments))
+    dict_bytes = measure(lambda: as_dicts(build_history(years, classes, assignments)))
+
+    print(f"{total} assignments ({years} years, {classes} classes, {assignments} per class)")
+    print(f"records: {record_bytes / 1024 / 1024:8.2f} MiB ({record_bytes / total:6.0f} B/assignment)")
+    print(f"dicts:   {dict_bytes / 1024 / 1024:8.2f} MiB ({dict_bytes / total:6.0f} B/assignment)")
+    print(f"saved:   {100 * (1 - record_bytes / dict_bytes):7.1f}%")
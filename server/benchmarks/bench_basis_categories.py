@@ -0,0 +1,55 @@
+"""Shows Schoology course parsing scaling linearly with the number of rows
+
+Builds synthetic gradebooks with a growing number of categories and
+times the per-category find_all lookup the scraper used to do against
+the single-pass parent index, plus the full parse_basis_categories.
+
+Usage: python server/benchmarks/bench_basis_categories.py
+"""
+import time
+
+from bs4 import BeautifulSoup as bS
+
+import synthetic
+from scrape import BasisWeights, clean_gradebook, index_rows_by_parent, parse_basis_categories
+
+ASSIGNMENTS_PER_CATEGORY = 25
+
+
+def course_table(categories: int):
+    page = synthetic.schoology_gradebook(1, categories, ASSIGNMENTS_PER_CATEGORY)
+    soup = bS(page, 'html.parser')
+    # get_present strips screen reader text from the whole page before parsing courses
+    clean_gradebook(soup)
+    return soup.find('table', role='presentation')
+
+
+def lookup_per_category(table) -> int:
+    found = 0
+    for category in table.find_all('tr', class_='category-row'):
+        found += len(table.find_all('tr', {'data-parent-id': category['data-id']}))
+    return found
+
+
+def lookup_indexed(table) -> int:
+    rows_by_parent = index_rows_by_parent(table)
+    return sum(len(rows_by_parent.get(category['data-id'], ()))
+               for category in table.find_all('tr', class_='category-row'))
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'categories':>10} {'rows':>6} {'find_all us/row':>16} {'indexed us/row':>15} {'parse us/row':>13}")
+    for categories in (4, 8, 16, 32, 64):
+        rows = categories * ASSIGNMENTS_PER_CATEGORY
+        table = course_table(categories)
+        per_category = timed(lookup_per_category, table)
+        indexed = timed(lookup_indexed, table)
+        parse = timed(parse_basis_categories, course_table(categories), "Course", BasisWeights())
+        print(f"{categories:>10} {rows:>6} {per_category / rows * 1e6:>16.1f} {indexed / rows * 1e6:>15.1f} "
+              f"{parse / rows * 1e6:>13.1f}")
@@ -0,0 +1,46 @@
+"""Compares stripping visually-hidden spans per element against one pass
+
+The scraper used to call clean() on every course title, term header,
+category row, assignment title and due date. It now cleans the same
+elements of the whole gradebook in one pass right after parsing.
+
+Usage: python server/benchmarks/bench_basis_clean.py
+"""
+import time
+
+from bs4 import BeautifulSoup as bS
+
+import synthetic
+from scrape import clean, clean_gradebook, index_rows_by_parent
+
+
+def clean_per_element(soup) -> None:
+    for course in soup.find_all('div', class_='gradebook-course'):
+        clean(course.find('div', class_='gradebook-course-title'))
+        table = course.find('div', class_='gradebook-course-grades').find('table', role='presentation')
+        clean(table.find('tr', class_='period-row').find('span', class_='title'))
+        rows_by_parent = index_rows_by_parent(table)
+        for category in table.find_all('tr', class_='category-row'):
+            clean(category)
+            for row in rows_by_parent.get(category['data-id'], ()):
+                clean(row.find('span', class_='title'))
+                due_date = row.find('span', class_='due-date')
+                if due_date is not None:
+                    clean(due_date)
+
+
+def timed(func, page: str) -> float:
+    soup = bS(page, 'html.parser')
+    start = time.perf_counter()
+    func(soup)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    print(f"{'courses':>7} {'rows':>6} {'per element ms':>15} {'single pass ms':>15}")
+    for courses in (4, 8, 16):
+        page = synthetic.schoology_gradebook(courses, 8, 30)
+        rows = courses * 8 * 30
+        per_element = timed(clean_per_element, page)
+        single_pass = timed(clean_gradebook, page)
+        print(f"{courses:>7} {rows:>6} {per_element * 1e3:>15.1f} {single_pass * 1e3:>15.1f}")
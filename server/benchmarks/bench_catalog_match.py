@@ -0,0 +1,57 @@
+"""Times and scores fuzzy matching of PowerSchool-style names to the catalog
+
+Every class in the bundled catalog.html is renamed the ways PowerSchool
+tends to name classes: abbreviated words, "AP" moved to the front and
+a section marker added. Each renamed class should match back to its
+catalog entry.
+
+Usage: python server/benchmarks/bench_catalog_match.py
+"""
+import random
+import re
+import time
+import timeit
+
+from bench_catalog_search import load_records
+from catalog_match import CatalogMatcher
+
+SHORT = {'Honors': 'Hon', 'Accelerated': 'Accel', 'Algebra': 'Alg', 'Calculus': 'Calc', 'Chemistry': 'Chem',
+         'Biology': 'Bio', 'History': 'Hist', 'Literature': 'Lit', 'Language': 'Lang', 'Computer': 'Comp',
+         'Science': 'Sci', 'Government': 'Govt', 'Economics': 'Econ', 'Psychology': 'Psych'}
+SECTIONS = [" - S1", " (S2)", " Sec 3", " P4", " - 01", ""]
+
+
+def powerschool_name(class_name: str, rng: random.Random) -> str:
+    name = " ".join(SHORT.get(word, word) for word in class_name.split())
+    if name.endswith(" AP"):
+        name = "AP " + name[:-3]
+    name = re.sub(r"\s*\(.*\)", "", name)
+    return name + rng.choice(SECTIONS)
+
+
+if __name__ == '__main__':
+    records = load_records()
+    class_names = [record['class_name'] for record in records]
+
+    start = time.perf_counter()
+    matcher = CatalogMatcher(class_names)
+    print(f"built from {len(class_names)} courses in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    rng = random.Random(0)
+    renamed = [powerschool_name(class_name, rng) for class_name in class_names]
+    matches = matcher.match(renamed)
+    correct = sum(match == class_name for (match, _), class_name in zip(matches, class_names))
+    unmatched = sum(match is None for match, _ in matches)
+    print(f"{correct}/{len(class_names)} matched back, {unmatched} unmatched")
+    for name, (match, confidence), class_name in zip(renamed, matches, class_names):
+        if match != class_name:
+            print(f"  {name!r} -> {match!r} ({confidence:.2f}), expected {class_name!r}")
+
+    runs = 200
+    per_run = timeit.timeit(lambda: matcher.match(renamed), number=runs) / runs
+    print(f"whole catalog: {per_run * 1e3:.2f} ms, {per_run / len(renamed) * 1e6:.1f} us per name")
+
+    sync = rng.sample(renamed, 8)
+    runs = 2000
+    per_sync = timeit.timeit(lambda: matcher.match(sync), number=runs) / runs
+    print(f"8 class sync: {per_sync * 1e6:.1f} us")
@@ -0,0 +1,51 @@
+"""Times keyword and facet searches against the local catalog index
+
+Parses the bundled catalog.html, builds and reloads the index, then
+times a handful of typical queries.
+
+Usage: python server/benchmarks/bench_catalog_search.py
+"""
+import os
+import tempfile
+import time
+import timeit
+
+import synthetic
+from catalog_index import CatalogIndex
+from catalog_to_json import Catalogger
+
+QUERIES = [
+    ("calculus", {}),
+    ("", {"department": "Mathematics", "grade_level": 11}),
+    ("history", {"class_type": "ap"}),
+    ("programming data", {"uc_csu_class_type": "uc"}),
+    ("art", {"grade_level": 9}),
+]
+
+
+def load_records() -> list:
+    os.chdir(os.path.dirname(synthetic.SERVER_DIR))
+    catalogger = Catalogger()
+    directory = tempfile.mkdtemp()
+    catalogger.index_fname = os.path.join(directory, "catalog_index.json.gz")
+    catalogger.lookup_fname = os.path.join(directory, "catalog_lookup.bin")
+    return catalogger.parse(use_local=True)
+
+
+if __name__ == '__main__':
+    records = load_records()
+    path = os.path.join(tempfile.mkdtemp(), "catalog_index.json.gz")
+    start = time.perf_counter()
+    CatalogIndex.build(records).save(path)
+    print(f"built {len(records)} courses in {(time.perf_counter() - start) * 1e3:.1f} ms, "
+          f"{os.path.getsize(path) / 1024:.1f} KiB on disk")
+
+    start = time.perf_counter()
+    index = CatalogIndex.load(path)
+    print(f"loaded in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    for query, facets in QUERIES:
+        runs = 2000
+        per_query = timeit.timeit(lambda: index.search(query, **facets), number=runs) / runs
+        print(f"{query!r:20} {str(facets):45} {len(index.search(query, limit=None, **facets)):4} hits "
+              f"{per_query * 1e6:7.1f} us")
@@ -0,0 +1,134 @@
+"""Times vectorized grade analytics against per-class loops over long histories
+
+Builds multi-year PowerSchool histories from synthetic assignment
+lookups, checks that AssignmentTable gives the same category and
+overall grades as a direct port of the per-class loops in
+authorized_index.ejs, then times both on one account and on many.
+
+Usage: python server/benchmarks/bench_grade_analytics.py [--accounts N]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+import synthetic
+from grade_analytics import AssignmentTable, letter_grades
+from scrape import PowerSchoolClassGrade, parse_ps_class, wire_format
+
+YEARS = ["20-21", "21-22", "22-23", "23-24"]
+CLASSES_PER_SEMESTER = 7
+ASSIGNMENTS_PER_CLASS = 60
+
+
+def history(seed: int) -> tuple:
+    """Returns the grades and weights of a four year history, half the classes weighted"""
+    rng = random.Random(seed)
+    grades = {}
+    weights = {}
+    for y, year in enumerate(YEARS):
+        grades[year] = {}
+        weights[year] = {}
+        for semester in ("S1", "S2"):
+            classes = []
+            class_weights = []
+            for c in range(CLASSES_PER_SEMESTER):
+                local_class = PowerSchoolClassGrade(f"Class {c}", "Teacher", False, False, None, None, False)
+                response = synthetic.powerschool_response(ASSIGNMENTS_PER_CLASS, 2020 + y, rng.randrange(1 << 30))
+                classes.append(wire_format(parse_ps_class(local_class, response)))
+                has_weights = c % 2 == 0
+                class_weights.append({"className": f"Class {c}", "hasWeights": has_weights,
+                                      "weights": {category: rng.choice([10, 20, 30, None])
+                                                  for category in synthetic.CATEGORIES} if has_weights else {}})
+            grades[year][semester] = classes
+            weights[year][semester] = class_weights
+    return grades, weights
+
+
+def loop_category_grade(local_class: dict, category: str) -> float or None:
+    total_gotten = 0
+    total_possible = 0
+    for grade in local_class['grades']:
+        if not grade['exclude'] and grade['category'] == category:
+            if grade['points_gotten'] is not False and grade['points_possible'] is not False:
+                total_gotten += grade['points_gotten']
+                total_possible += grade['points_possible']
+    if total_possible == 0:
+        return None
+    return np.floor(total_gotten / total_possible * 100 * 100 + 0.5) / 100
+
+
+def loop_overall_grade(local_class: dict, class_weights: dict or None) -> float or None:
+    if not class_weights or not class_weights['hasWeights']:
+        earned = 0
+        total = 0
+        for grade in local_class['grades']:
+            if grade['points_gotten'] is not False and grade['points_possible'] is not False and not grade['exclude']:
+                earned += grade['points_gotten']
+                total += grade['points_possible']
+        return earned / total * 100 if total else None
+    overall = 0
+    total_weight = 0
+    for category, weight in class_weights['weights'].items():
+        category_grade = loop_category_grade(local_class, category)
+        if category_grade is None:
+            continue
+        overall += category_grade * (weight or 0)
+        total_weight += weight or 0
+    return overall / total_weight if total_weight else None
+
+
+def loop_summary(syncs: list) -> list:
+    """Overall grade of every class, and every category grade like the page shows them"""
+    overall = []
+    for grades, weights in syncs:
+        for term, semesters in grades.items():
+            for semester, classes in semesters.items():
+                by_name = {entry['className']: entry for entry in weights[term][semester]}
+                for local_class in classes:
+                    for category in {grade['category'] for grade in local_class['grades']}:
+                        loop_category_grade(local_class, category)
+                    overall.append(loop_overall_grade(local_class, by_name.get(local_class['class_name'])))
+    return overall
+
+
+def vectorized_summary(syncs: list) -> np.ndarray:
+    table = AssignmentTable.from_syncs(syncs)
+    table.category_grades()
+    overall = table.overall_grades()
+    letter_grades(overall)
+    return overall
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+if __name__ == '__main__':
+    accounts = int(sys.argv[sys.argv.index("--accounts") + 1]) if "--accounts" in sys.argv else 50
+    syncs = [history(seed) for seed in range(accounts)]
+    assignments = accounts * len(YEARS) * 2 * CLASSES_PER_SEMESTER * ASSIGNMENTS_PER_CLASS
+
+    expected = np.array([np.nan if grade is None else grade for grade in loop_summary(syncs)])
+    got = vectorized_summary(syncs)
+    assert np.allclose(expected, got, equal_nan=True), "vectorized grades differ from the loops"
+
+    for label, subset in (("1 account", syncs[:1]), (f"{accounts} accounts", syncs)):
+        _, loop_ms = timed(loop_summary, subset)
+        table, load_ms = timed(AssignmentTable.from_syncs, subset)
+        _, category_ms = timed(table.category_grades)
+        _, overall_ms = timed(table.overall_grades)
+        _, gpa_ms = timed(table.gpas, True)
+        print(f"{label:12} loops {loop_ms:8.2f} ms   load {load_ms:8.2f} ms   categories {category_ms:6.2f} ms"
+              f"   overall {overall_ms:6.2f} ms   gpa {gpa_ms:6.2f} ms")
+
+    # What-if grades only recompute from the loaded arrays
+    table = AssignmentTable.from_syncs(syncs)
+    rng = random.Random(0)
+    table.what_if({})
+    scores = {psaid: 0 for psaid in rng.sample(table.psaids, 100)}
+    _, what_if_ms = timed(table.what_if, scores)
+    print(f"what-if of 100 assignments over {assignments} assignments: {what_if_ms:.2f} ms")
@@ -0,0 +1,90 @@
+"""Times scans over columnar exports against walking the scraped JSON
+
+Exports the synthetic histories of bench_grade_analytics.py as .npy
+columns, and as Parquet when pyarrow is installed, then times loading
+each export and a per-category mean of graded, not excluded assignments
+against the same scan over the result JSON lines.
+
+Usage: python server/benchmarks/bench_grade_columns.py [--accounts N]
+"""
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_grade_analytics import history
+from grade_columns import ColumnWriter, load
+
+
+def json_scan(lines: list) -> dict:
+    totals = {}
+    for line in lines:
+        for semesters in json.loads(line)['new_grades'].values():
+            for classes in semesters.values():
+                for local_class in classes:
+                    for grade in local_class['grades']:
+                        if grade['exclude'] or grade['points_gotten'] is False or grade['points_possible'] is False:
+                            continue
+                        gotten, possible = totals.get(grade['category'], (0, 0))
+                        totals[grade['category']] = (gotten + grade['points_gotten'],
+                                                     possible + grade['points_possible'])
+    return {category: gotten / possible * 100 for category, (gotten, possible) in totals.items()}
+
+
+def column_scan(path: str) -> dict:
+    grade_columns = load(path)
+    gotten = grade_columns['points_gotten']
+    possible = grade_columns['points_possible']
+    category = grade_columns['category']
+    included = ~grade_columns['exclude'] & ~np.isnan(gotten) & ~np.isnan(possible)
+    categories = len(grade_columns.dictionaries['category'])
+    gotten_sums = np.bincount(category[included], gotten[included], minlength=categories)
+    possible_sums = np.bincount(category[included], possible[included], minlength=categories)
+    return {str(name): gotten_sums[i] / possible_sums[i] * 100
+            for i, name in enumerate(grade_columns.dictionaries['category']) if possible_sums[i]}
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def size_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 2 ** 20
+    return os.path.getsize(path) / 2 ** 20
+
+
+if __name__ == '__main__':
+    accounts = int(sys.argv[sys.argv.index("--accounts") + 1]) if "--accounts" in sys.argv else 50
+    lines = [json.dumps({'id': i, 'success': True, 'new_grades': history(i)[0]}) for i in range(accounts)]
+    writer = ColumnWriter()
+    for line in lines:
+        message = json.loads(line)
+        writer.add(message['new_grades'], message['id'])
+
+    expected, json_ms = timed(json_scan, lines)
+    print(f"{writer.rows} assignments, {sum(map(len, lines)) / 2 ** 20:.1f} MiB of JSON")
+    print(f"json         scan {json_ms:8.2f} ms")
+
+    paths = ["columns"]
+    if importlib.util.find_spec("pyarrow"):
+        paths.append("columns.parquet")
+    else:
+        print("pyarrow is not installed, skipping Parquet")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in paths:
+            path = os.path.join(directory, name)
+            _, write_ms = timed(writer.write, path)
+            _, load_ms = timed(load, path)
+            got, scan_ms = timed(column_scan, path)
+            assert got.keys() == expected.keys() and all(np.isclose(got[key], expected[key]) for key in got), \
+                f"{name} scan differs from the JSON scan"
+            print(f"{name:16} write {write_ms:8.2f} ms   load {load_ms:6.2f} ms   scan {scan_ms:6.2f} ms"
+                  f"   {size_mb(path):6.2f} MiB")
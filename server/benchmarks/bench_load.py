@@ -0,0 +1,132 @@
+"""Load tests concurrent syncs against the local stand-in server
+
+Starts benchmarks/stand_in.py with the given latency and 429 rate and
+runs --syncs present syncs, --concurrency at a time, through one of:
+
+    process: one scrape.py process per sync, the way Node runs them
+    batch: BatchSync threads inside this process
+
+and reports syncs per second, p50/p95/p99 sync latency, CPU seconds
+per sync and peak RSS per worker. In process mode each scrape.py is a
+worker, in batch mode this process is the only one. Rate-limited
+requests are retried after the scraper's own 2 second or longer
+backoff, so even a small --rate-limit shows up in the tail. With
+--parse-workers N, PowerSchool pages are parsed in a process pool of N,
+one per scrape.py or one shared by every BatchSync thread.
+
+Usage: python server/benchmarks/bench_load.py [--mode process|batch] [--school ndsj|basis] [--syncs N]
+                                              [--concurrency N] [--latency-ms N] [--jitter-ms N] [--rate-limit P]
+                                              [--parse-workers N]
+"""
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import synthetic
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(share * (len(ordered) - 1)))]
+
+
+def start_stand_in(latency_ms: float, jitter_ms: float, rate_limit: float) -> tuple:
+    """Starts the stand-in server in its own process so it does not share this one's CPU
+
+    Returns:
+        The process and its base url
+    """
+    process = subprocess.Popen([sys.executable, "stand_in.py", "--latency-ms", str(latency_ms),
+                                "--jitter-ms", str(jitter_ms), "--rate-limit", str(rate_limit)],
+                               cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def process_sync(school: str, base_url: str, parse_workers: int = 0) -> dict:
+    """Runs one sync as a scrape.py process"""
+    stdin = f"{school}\nuser\npassword\n" + ("" if school == "basis" else "[]\n{}\nfalse\n")
+    args = ("--parse-workers", str(parse_workers)) if parse_workers else ()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "scrape.py", *args], cwd=synthetic.SERVER_DIR, text=True,
+                               env=dict(os.environ, SCRAPE_BASE_URL=base_url),
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdin.write(stdin)
+    process.stdin.close()
+    lines = process.stdout.read().splitlines()
+    # wait4 gives the CPU time and peak RSS of this child, including the parse workers it joined
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    latency = time.perf_counter() - start
+    result = json.loads(lines[-1]) if lines else {}
+    return {'success': result.get('success', False), 'latency': latency,
+            'cpu': usage.ru_utime + usage.ru_stime, 'rss_mb': usage.ru_maxrss / 1024}
+
+
+def run_processes(school: str, base_url: str, syncs: int, concurrency: int, parse_workers: int = 0) -> list:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda _: process_sync(school, base_url, parse_workers), range(syncs)))
+
+
+def run_batch(school: str, base_url: str, syncs: int, concurrency: int, parse_workers: int = 0) -> list:
+    """Runs every sync on BatchSync's threads in this process"""
+    # BatchSync reads the base url when it is created
+    os.environ["SCRAPE_BASE_URL"] = base_url
+    from batch import BatchSync
+
+    timings = {}
+
+    class TimedBatchSync(BatchSync):
+        def sync(self, account: dict) -> None:
+            start = time.perf_counter()
+            cpu = time.thread_time()
+            super().sync(account)
+            timings[account['id']] = (time.perf_counter() - start, time.thread_time() - cpu)
+
+    out = io.StringIO()
+    accounts = [{'id': i, 'school': school, 'username': "user", 'password': "password"} for i in range(syncs)]
+    parse_pool = ProcessPoolExecutor(parse_workers) if parse_workers else None
+    TimedBatchSync(limits={school: concurrency}, out=out, parse_pool=parse_pool).run(accounts)
+    if parse_pool is not None:
+        parse_pool.shutdown()
+    results = {line['id']: line for line in map(json.loads, out.getvalue().splitlines())}
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return [{'success': results[i].get('success', False), 'latency': timings[i][0], 'cpu': timings[i][1],
+             'rss_mb': rss_mb} for i in range(syncs)]
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+
+    def option(flag: str, default, kind=str):
+        return kind(args[args.index(flag) + 1]) if flag in args else default
+
+    mode = option("--mode", "process")
+    school = option("--school", "ndsj")
+    syncs = option("--syncs", 40, int)
+    concurrency = option("--concurrency", 8, int)
+    stand_in, base_url = start_stand_in(option("--latency-ms", 50.0, float), option("--jitter-ms", 20.0, float),
+                                        option("--rate-limit", 0.0, float))
+    try:
+        start = time.perf_counter()
+        results = (run_batch if mode == "batch" else run_processes)(school, base_url, syncs, concurrency,
+                                                                   option("--parse-workers", 0, int))
+        elapsed = time.perf_counter() - start
+    finally:
+        stand_in.terminate()
+        stand_in.wait()
+
+    latencies = [result['latency'] * 1e3 for result in results]
+    failed = sum(not result['success'] for result in results)
+    print(f"{mode} mode, {school}, {syncs} syncs, {concurrency} at a time")
+    print(f"throughput     {syncs / elapsed:8.2f} syncs/s over {elapsed:.2f} s, {failed} failed")
+    print(f"latency        p50 {percentile(latencies, 0.5):8.1f} ms  p95 {percentile(latencies, 0.95):8.1f} ms"
+          f"  p99 {percentile(latencies, 0.99):8.1f} ms")
+    print(f"cpu per sync   {statistics.mean(result['cpu'] for result in results) * 1e3:8.1f} ms")
+    print(f"peak rss       {max(result['rss_mb'] for result in results):8.1f} MiB per worker")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,173 @@
+"""Times each page extractor against fixture pages and gates regressions
+
+The extractors run on the sanitized pages in benchmarks/fixtures, and
+on copies scaled up to far more rows than a real account has:
+
+    ps_class: parse_ps_class on an assignment lookup response
+    class_page: class, teacher, section and student ids of a scores page
+    home: class rows of the PowerSchool home page
+    term: semesters and classes of a grade history term page
+    basis: BasisScraper.get_present on a Schoology gradebook
+    catalog: Catalogger's card parsing of the bundled catalog.html
+
+The median milliseconds of each are compared against
+benchmarks/baselines.json. Machines, and one machine over time, differ
+in speed, so a fixed pure Python workload is timed before every run of a
+benchmark and runs are scaled by how much faster or slower it ran than
+when the baselines were recorded. Record baselines on a new
+machine with --update before relying on --check, which exits with
+status 1 when a scaled median is more than --tolerance (0.3 by
+default) slower than its baseline.
+
+Usage: python server/benchmarks/bench_parsers.py [--runs N] [--only name,...] [--update | --check [--tolerance T]]
+"""
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from bs4 import BeautifulSoup as BS
+
+import synthetic
+from catalog_to_json import Catalogger
+from scrape import (BasisScraper, PowerSchoolClassGrade, parse_class_header, parse_class_ids, parse_home_classes,
+                    parse_html, parse_ps_class, parse_term_rows)
+
+BASELINES_FNAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Rows repeated in the scaled copies of the fixtures
+SCALE = 20
+
+
+def ps_class(response: synthetic.FakeResponse) -> None:
+    parse_ps_class(PowerSchoolClassGrade("Class", "Teacher", 95.0, "A", None, None, False), response)
+
+
+def class_page(page: str) -> None:
+    soup = parse_html(page)
+    parse_class_header(soup)
+    parse_class_ids(soup)
+
+
+def basis(page: str) -> None:
+    out = []
+    scraper = BasisScraper(out.append)
+    scraper.post_with_retries = lambda *args, **kwargs: synthetic.FakeResponse(page)
+    scraper.get_present()
+
+
+def catalogger() -> Catalogger:
+    # Catalogger writes to MongoDB when the script is given any argument
+    argv, sys.argv = sys.argv, sys.argv[:1]
+    try:
+        return Catalogger()
+    finally:
+        sys.argv = argv
+
+
+def catalog(page: str) -> None:
+    parser = catalogger()
+    for card in BS(page, 'html.parser').find_all('div', class_='card'):
+        parser.parse_card(card)
+
+
+def cases() -> dict:
+    """Returns each benchmark's name mapped to its function and argument"""
+    home = synthetic.fixture("powerschool_home.html")
+    term = synthetic.fixture("powerschool_termgrades.html")
+    gradebook = synthetic.fixture("schoology_grades.html")
+    with open(os.path.join(os.path.dirname(synthetic.SERVER_DIR), "catalog.html"), encoding='utf8') as f:
+        catalog_page = f.read()
+    return {
+        "ps_class": (ps_class, synthetic.FakeResponse(synthetic.fixture("powerschool_lookup.json"))),
+        "ps_class_large": (ps_class, synthetic.powerschool_response(40 * SCALE)),
+        "class_page": (class_page, synthetic.fixture("powerschool_scores.html")),
+        "home": (lambda page: parse_home_classes(parse_html(page)), home),
+        "home_large": (lambda page: parse_home_classes(parse_html(page)), synthetic.scaled(home, SCALE)),
+        "term": (lambda page: parse_term_rows(parse_html(page)), term),
+        "term_large": (lambda page: parse_term_rows(parse_html(page)), synthetic.scaled(term, SCALE)),
+        "basis": (basis, gradebook),
+        "basis_large": (basis, synthetic.schoology_gradebook(8, 6, 40)),
+        "catalog": (catalog, catalog_page),
+    }
+
+
+def calibration(_=None) -> list:
+    """Fixed workload of the dict, string and sorting work parsers do"""
+    rng = random.Random(0)
+    counts = {}
+    for _ in range(25000):
+        key = str(rng.random())[:6]
+        counts[key] = counts.get(key, 0) + len(key.split("."))
+    return sorted(counts)
+
+
+def timed_ms(func, arg) -> float:
+    # Garbage from the last run is not charged to this one
+    gc.collect()
+    start = time.perf_counter()
+    func(arg)
+    return (time.perf_counter() - start) * 1e3
+
+
+def measure(func, arg, runs: int) -> tuple:
+    """Returns the median milliseconds of func and of func relative to the calibration workload"""
+    samples = []
+    relative = []
+    for _ in range(runs):
+        calibration_ms = timed_ms(calibration, None)
+        samples.append(timed_ms(func, arg))
+        relative.append(samples[-1] / calibration_ms)
+    return statistics.median(samples), statistics.median(relative)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    runs = int(args[args.index("--runs") + 1]) if "--runs" in args else 7
+    tolerance = float(args[args.index("--tolerance") + 1]) if "--tolerance" in args else 0.3
+    benchmarks = cases()
+    if "--only" in args:
+        names = args[args.index("--only") + 1].split(",")
+        benchmarks = {name: benchmarks[name] for name in names}
+
+    try:
+        with open(BASELINES_FNAME) as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {"calibration_ms": None, "medians_ms": {}}
+
+    if baselines["calibration_ms"] is None:
+        baselines["calibration_ms"] = round(statistics.median(timed_ms(calibration, None) for _ in range(7)), 3)
+
+    scaled_medians = {}
+    regressed = []
+    for name, (func, arg) in benchmarks.items():
+        # One untimed run so imports and caches are warm
+        func(arg)
+        median, relative = measure(func, arg, runs)
+        # Scaled to the speed the machine had when the baselines were first recorded
+        scaled = relative * baselines["calibration_ms"]
+        scaled_medians[name] = scaled
+        line = f"{name:15} median {median:9.3f} ms  scaled {scaled:9.3f} ms"
+        if name in baselines["medians_ms"]:
+            change = scaled / baselines["medians_ms"][name] - 1
+            line += f"  baseline {baselines['medians_ms'][name]:9.3f} ms  {change:+7.1%}"
+            if change > tolerance:
+                regressed.append(name)
+                line += "  REGRESSED"
+        print(line)
+
+    if "--update" in args:
+        baselines["medians_ms"].update({name: round(scaled, 3) for name, scaled in scaled_medians.items()})
+        with open(BASELINES_FNAME, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baselines to {BASELINES_FNAME}")
+    elif "--check" in args:
+        if regressed:
+            print(f"{len(regressed)} over the {tolerance:.0%} tolerance: {', '.join(regressed)}")
+            sys.exit(1)
+        print(f"All within {tolerance:.0%} of their baselines")
@@ -0,0 +1,83 @@
+"""Measures scrape.py cold start against a latency budget
+
+Every sync spawns a new scrape.py, so its start up is paid on every
+sync. This records:
+
+    import: cumulative `python -X importtime` cost of importing scrape,
+        and whether requests or bs4 were loaded by it
+    first progress: spawn to the first progress line on stdout
+    failed login: spawn to the result of a login rejected before any request
+
+The syncs use a zero second deadline so no request is ever sent.
+Exits with status 1 when a median is over its budget.
+
+Usage: python server/benchmarks/bench_startup.py [--runs N] [--budget-ms first_progress=N ...]
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+import synthetic
+
+# Median milliseconds allowed for each measurement
+BUDGETS_MS = {"import": 60, "first_progress": 150, "failed_login": 150}
+
+
+def import_time() -> tuple:
+    """Returns milliseconds scrape's imports took and the heavy modules they loaded"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import scrape"], cwd=synthetic.SERVER_DIR,
+                            capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(total) / 1e3
+    return cumulative["scrape"], sorted(name for name in ("requests", "bs4") if name in cumulative)
+
+
+def time_to_first_line(stdin: str, args: tuple = ()) -> float:
+    """Spawns scrape.py and returns milliseconds until it wrote its first line"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "scrape.py", *args], cwd=synthetic.SERVER_DIR, text=True,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdin.write(stdin)
+    process.stdin.close()
+    process.stdout.readline()
+    elapsed = (time.perf_counter() - start) * 1e3
+    process.stdout.read()
+    process.wait()
+    return elapsed
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    runs = 10
+    if "--runs" in args:
+        runs = int(args[args.index("--runs") + 1])
+    budgets = dict(BUDGETS_MS)
+    while "--budget-ms" in args:
+        i = args.index("--budget-ms")
+        name, budget = args[i + 1].split("=")
+        budgets[name] = float(budget)
+        del args[i:i + 2]
+
+    samples = {"import": [], "first_progress": [], "failed_login": []}
+    heavy = set()
+    for _ in range(runs):
+        import_ms, loaded = import_time()
+        samples["import"].append(import_ms)
+        heavy.update(loaded)
+        samples["first_progress"].append(time_to_first_line("basis\nuser\npassword\n", ("--deadline", "0")))
+        samples["failed_login"].append(time_to_first_line("basis\nuser\n\n"))
+
+    over = False
+    for name, values in samples.items():
+        median = statistics.median(values)
+        over_budget = median > budgets[name]
+        over = over or over_budget
+        print(f"{name:15} median {median:6.1f} ms  max {max(values):6.1f} ms  budget {budgets[name]:5.0f} ms"
+              f"{'  OVER BUDGET' if over_budget else ''}")
+    print(f"heavy modules loaded by import: {', '.join(sorted(heavy)) or 'none'}")
+    sys.exit(1 if over else 0)
@@ -0,0 +1,135 @@
+"""Local stand-in for NDSJ PowerSchool and Schoology, for load tests
+
+Serves the fixture pages for every request a present sync makes, with
+the original host as the first path segment, the way scrape.py sends
+them when SCRAPE_BASE_URL points here. Every response is delayed by
+--latency-ms plus up to --jitter-ms, and a --rate-limit share of
+requests get a 429 instead.
+
+Bellarmine logs in through ADFS SAML, which is not served, so
+PowerSchool load is tested with NDSJ accounts. Any password works
+except "wrong".
+
+Usage: python server/benchmarks/stand_in.py [--port N] [--latency-ms N] [--jitter-ms N] [--rate-limit P]
+"""
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import synthetic
+
+home_page = synthetic.fixture("powerschool_home.html")
+scores_page = synthetic.fixture("powerschool_scores.html")
+lookup_json = synthetic.fixture("powerschool_lookup.json")
+gradebook_page = synthetic.fixture("schoology_grades.html")
+invalid_login_page = ('<html><body><div class="feedback-alert">Invalid Username or Password!</div>'
+                      '</body></html>')
+termgrades_page = ('<html><body><div id="content-main"><table class="linkDescList grid"><tr><th>S1</th></tr>'
+                   '</table></div></body></html>')
+schedule_page = '<html><body><table><tr><td>23-24</td><td>S1</td></tr></table></body></html>'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.05
+    jitter = 0.02
+    rate_limit = 0.0
+    _random = random.Random(0)
+    _random_lock = threading.Lock()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _delay(self) -> bool:
+        """Waits out the injected latency
+
+        Returns:
+            True if the request should be rate-limited
+        """
+        with StandInHandler._random_lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            limited = self._random.random() < self.rate_limit
+        time.sleep(delay)
+        return limited
+
+    def _send(self, status: int, body: str = "", content_type: str = "text/html", headers: dict or None = None):
+        data = body.encode('utf8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> tuple:
+        """Returns the original host, path and query of the request"""
+        parts = urlsplit(self.path)
+        _, host, path = parts.path.split("/", 2)
+        return host.split(":")[0], "/" + path, parse_qs(parts.query)
+
+    def do_GET(self) -> None:
+        if self._delay():
+            return self._send(429)
+        host, path, query = self._route()
+        if path == "/guardian/home.html":
+            self._send(200, home_page)
+        elif path == "/guardian/termgrades.html":
+            self._send(200, termgrades_page)
+        elif path == "/guardian/scores.html":
+            # Each class gets its own section id
+            section_id = str(int(query.get("frn", ["0"])[0]) % 100000)
+            self._send(200, scores_page.replace('data-sectionid="98765"', f'data-sectionid="{section_id}"'))
+        elif path == "/guardian/myschedulematrix.html":
+            self._send(200, schedule_page)
+        else:
+            self._send(404)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode('utf8')
+        if self._delay():
+            return self._send(429)
+        host, path, _ = self._route()
+        form = parse_qs(body)
+        if path == "/guardian/home.html":
+            # NDSJ login
+            self._send(200, invalid_login_page if form.get("pw") == ["wrong"] else home_page)
+        elif path == "/ws/xte/assignment/lookup":
+            self._send(200, lookup_json, "application/json")
+        elif host == "app.schoology.com" and path == "/login":
+            if form.get("pass") == ["wrong"]:
+                self._send(200, "<html></html>")
+            else:
+                self._send(302, headers={"Location": "/grades/grades", "Set-Cookie": "SESS=stand-in; Path=/"})
+        elif host == "app.schoology.com" and path == "/grades/grades":
+            self._send(200, gradebook_page)
+        else:
+            self._send(404)
+
+
+def serve(port: int = 0, latency_ms: float = 50, jitter_ms: float = 20, rate_limit: float = 0.0) -> ThreadingHTTPServer:
+    """Returns a stand-in server bound to 127.0.0.1, call serve_forever() to start it"""
+    StandInHandler.latency = latency_ms / 1e3
+    StandInHandler.jitter = jitter_ms / 1e3
+    StandInHandler.rate_limit = rate_limit
+    server = ThreadingHTTPServer(("127.0.0.1", port), StandInHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {}
+    for flag, name, kind in (("--port", "port", int), ("--latency-ms", "latency_ms", float),
+                             ("--jitter-ms", "jitter_ms", float), ("--rate-limit", "rate_limit", float)):
+        if flag in args:
+            options[name] = kind(args[args.index(flag) + 1])
+    stand_in = serve(**options)
+    print(f"http://127.0.0.1:{stand_in.server_address[1]}", flush=True)
+    try:
+        stand_in.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,110 @@
+"""Synthetic PowerSchool and Schoology data for the scraper benchmarks
+
+Everything here is generated from a seeded random number generator so
+runs are repeatable and no real student data is ever needed.
+"""
+import json
+import os
+import random
+import re
+import sys
+
+# Benchmarks import the scraper modules that live one directory up
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CATEGORIES = ["Tests", "Quizzes", "Homework", "Labs", "Projects", "Participation"]
+
+
+class FakeResponse:
+    """Stands in for requests.Response where only .text is read"""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.status_code = 200
+
+
+def powerschool_assignments(count: int, year: int = 2023, seed: int = 0) -> list:
+    """Returns a /ws/xte/assignment/lookup style payload with count assignments"""
+    rng = random.Random(seed)
+    payload = []
+    for i in range(count):
+        possible = rng.choice([5, 10, 20, 50, 100])
+        score = {
+            "isexempt": rng.random() < 0.02,
+            "scorepoints": round(rng.uniform(0.5, 1.0) * possible, 1),
+            "scorepercent": rng.uniform(50, 100),
+        }
+        if rng.random() < 0.1:
+            score["_assignmentscorecomment"] = {"commentvalue": "Nice work"}
+        section = {
+            "duedate": f"{year + (i % 10 >= 5)}-{(i % 5) * 2 + 1:02d}-{i % 28 + 1:02d}",
+            "name": f"Assignment {i}",
+            "iscountedinfinalgrade": rng.random() > 0.05,
+            "totalpointvalue": possible,
+            "_assignmentcategoryassociations": [{"_teachercategory": {"name": rng.choice(CATEGORIES)}}],
+            "_assignmentscores": [score] if rng.random() > 0.1 else [],
+        }
+        if rng.random() < 0.3:
+            section["description"] = "Complete the problems at the end of the chapter."
+        payload.append({"assignmentid": 100000 + i, "_assignmentsections": [section]})
+    return payload
+
+
+def powerschool_response(count: int, year: int = 2023, seed: int = 0) -> FakeResponse:
+    return FakeResponse(json.dumps(powerschool_assignments(count, year, seed)))
+
+
+def schoology_gradebook(courses: int, categories: int, assignments: int, seed: int = 0) -> str:
+    """Returns a Schoology grades/grades page
+
+    Each course gets the given number of categories, each holding the
+    given number of assignments. Titles and due dates carry the
+    visually-hidden spans the real page has.
+    """
+    rng = random.Random(seed)
+    hidden = '<span class="visually-hidden">hidden text</span>'
+    parts = ['<html><body><div id="main">']
+    for c in range(courses):
+        parts.append(f'<div class="gradebook-course"><div class="gradebook-course-title">{hidden}'
+                     f'<span>Course {c}: Section {c}</span></div>'
+                     f'<div class="gradebook-course-grades">'
+                     f'<span class="numeric-grade primary-grade"><span class="rounded-grade" title="{rng.uniform(60, 100):.2f}%">'
+                     f'</span></span><table role="presentation"><tbody>'
+                     f'<tr class="period-row" data-id="p{c}"><td><span class="title">2023 - 2024{hidden}</span></td></tr>')
+        for k in range(categories):
+            category_id = f"c{c}-{k}"
+            parts.append(f'<tr class="category-row" data-id="{category_id}" data-parent-id="p{c}"><td>'
+                         f'<span class="title">{CATEGORIES[k % len(CATEGORIES)]} {k}{hidden}</span>'
+                         f'<span class="percentage-contrib">({100 // categories}%)</span></td></tr>')
+            for a in range(assignments):
+                month = rng.randint(1, 12)
+                year = 23 if month >= 8 else 24
+                due = (f'<span class="due-date">{hidden}{month:02d}/{rng.randint(1, 28):02d}/{year} 11:59pm</span>'
+                       if rng.random() > 0.05 else '')
+                possible = rng.choice([10, 20, 100])
+                parts.append(f'<tr class="item-row" data-id="a{c}-{k}-{a}" data-parent-id="{category_id}"><td>'
+                             f'<span class="title">{hidden}Assignment {a}</span>{due}</td>'
+                             f'<td class="grade-column"><span class="rounded-grade" title="{rng.randint(0, possible)}">'
+                             f'</span><span class="max-grade"> / {possible}</span></td></tr>')
+        parts.append('</tbody></table></div></div>')
+    parts.append('</div></body></html>')
+    return "".join(parts)
+
+
+def fixture(name: str) -> str:
+    """Returns the text of a sanitized page in benchmarks/fixtures"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf8') as f:
+        return f.read()
+
+
+def scaled(page: str, times: int) -> str:
+    """Repeats the rows between a fixture's <!-- rows --> markers
+
+    Row ids and links repeat too, which the extractors do not mind.
+    """
+    match = re.search(r"<!-- rows -->(.*)<!-- /rows -->", page, re.DOTALL)
+    return page[:match.start(1)] + match.group(1) * times + page[match.end(1):]
@@ -0,0 +1,134 @@
+"""Inverted search index over the parsed BCP catalog
+
+Catalogger.parse writes the index next to catalog.html so course
+searches can be answered locally without a database round trip:
+
+    index = CatalogIndex.load("catalog_index.json.gz")
+    index.search("calculus", department="Mathematics", grade_level=11)
+
+Class names and descriptions are tokenized into postings lists of
+course ids, and department, grade level, classType and uc_csuClassType
+each get facet postings. Postings are delta encoded on disk and held
+as sets once loaded, so a query is a few set intersections.
+"""
+import gzip
+import json
+import re
+
+# Fields of each catalog record kept in the index
+record_fields = ('class_name', 'department', 'grade_levels', 'credits', 'terms', 'classType', 'uc_csuClassType',
+                 'description', 'prereq')
+facet_fields = ('department', 'grade_levels', 'classType', 'uc_csuClassType')
+
+stop_words = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of', 'on', 'or',
+              'that', 'the', 'this', 'to', 'will', 'with'}
+
+# How much more a query word counts when it is in the class name rather than the description
+name_weight = 3
+
+
+def tokenize(text: str) -> list:
+    """Splits text into lowercase words without stop words"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in stop_words]
+
+
+def _encode(ids) -> list:
+    ids = sorted(ids)
+    return [ids[0]] + [b - a for a, b in zip(ids, ids[1:])] if ids else []
+
+
+def _decode(deltas: list) -> frozenset:
+    ids = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        ids.append(total)
+    return frozenset(ids)
+
+
+class CatalogIndex:
+    def __init__(self, records: list, names: dict, descriptions: dict, facets: dict) -> None:
+        """
+        Args:
+            records: catalog records, a record's position is its id
+            names: class name word to ids
+            descriptions: description word to ids
+            facets: facet field to facet value to ids
+        """
+        self.records = records
+        self.names = names
+        self.descriptions = descriptions
+        self.facets = facets
+        self._all = frozenset(range(len(records)))
+
+    @classmethod
+    def build(cls, records: list) -> 'CatalogIndex':
+        """Indexes records as returned by Catalogger.parse"""
+        kept = [{field: record.get(field) for field in record_fields} for record in records]
+        names = {}
+        descriptions = {}
+        facets = {field: {} for field in facet_fields}
+        for i, record in enumerate(kept):
+            for token in tokenize(record['class_name']):
+                names.setdefault(token, set()).add(i)
+            for token in tokenize(record['description'] or ''):
+                descriptions.setdefault(token, set()).add(i)
+            for field in facet_fields:
+                values = record[field] if field == 'grade_levels' else [record[field]]
+                for value in values or ():
+                    facets[field].setdefault(str(value), set()).add(i)
+
+        freeze = lambda postings: {key: frozenset(ids) for key, ids in postings.items()}
+        return cls(kept, freeze(names), freeze(descriptions),
+                   {field: freeze(postings) for field, postings in facets.items()})
+
+    def save(self, path: str) -> None:
+        encode = lambda postings: {key: _encode(ids) for key, ids in postings.items()}
+        data = {
+            'records': self.records,
+            'names': encode(self.names),
+            'descriptions': encode(self.descriptions),
+            'facets': {field: encode(postings) for field, postings in self.facets.items()},
+        }
+        with gzip.open(path, 'wt', encoding='utf8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'CatalogIndex':
+        with gzip.open(path, 'rt', encoding='utf8') as f:
+            data = json.load(f)
+        decode = lambda postings: {key: _decode(deltas) for key, deltas in postings.items()}
+        return cls(data['records'], decode(data['names']), decode(data['descriptions']),
+                   {field: decode(postings) for field, postings in data['facets'].items()})
+
+    def search(self, query: str = "", department: str or None = None, grade_level: int or None = None,
+               class_type: str or None = None, uc_csu_class_type: str or None = None, limit: int or None = 20) -> list:
+        """Finds courses matching every word of the query and every given facet
+
+        Courses are ranked by how many query words are in their name
+        rather than only their description, then by name.
+
+        Returns:
+            Matching catalog records
+        """
+        candidates = self._all
+        for field, value in (('department', department), ('grade_levels', grade_level),
+                             ('classType', class_type), ('uc_csuClassType', uc_csu_class_type)):
+            if value is not None:
+                candidates = candidates & self.facets[field].get(str(value), frozenset())
+
+        tokens = tokenize(query)
+        empty = frozenset()
+        for token in tokens:
+            if not candidates:
+                break
+            candidates = candidates & (self.names.get(token, empty) | self.descriptions.get(token, empty))
+
+        def rank(i: int) -> tuple:
+            score = sum(name_weight if i in self.names.get(token, empty) else 1 for token in tokens)
+            return -score, self.records[i]['class_name']
+
+        ranked = sorted(candidates, key=rank)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.records[i] for i in ranked]
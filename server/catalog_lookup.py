@@ -0,0 +1,139 @@
+"""Memory-mapped catalog lookup table keyed by (school, class_name)
+
+Written by catalog_to_json.py next to catalog.html and read by
+scrape.py, which attaches each synced class's catalog data without a
+database query per class.
+
+Layout, all little-endian:
+
+    header   b"GRCL", version u32, entry count u32
+    slots    one (key hash u64, record offset u32, record length u32) per
+             entry, sorted by hash
+    records  UTF-8 fields separated by 0x1f: school, class_name,
+             classType, uc_csuClassType, credits, terms
+
+Lookups binary search the slots in the mapped file and compare the
+stored key, so only the pages touched are read and nothing is parsed
+up front. Names without an exact entry can be matched fuzzily with
+match, which builds a CatalogMatcher per school on first use.
+"""
+import hashlib
+import mmap
+import struct
+
+from catalog_match import CatalogMatcher
+
+magic = b"GRCL"
+version = 1
+header = struct.Struct("<4sII")
+slot = struct.Struct("<QII")
+separator = "\x1f"
+
+
+def key_hash(school: str, class_name: str) -> int:
+    digest = hashlib.blake2b(f"{school}{separator}{class_name.strip()}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def write_lookup(records: list, path: str) -> None:
+    """Writes catalog records as returned by Catalogger.parse to a lookup file"""
+    entries = {}
+    for record in records:
+        school = record['school']
+        class_name = record['class_name'].strip()
+        fields = (school, class_name, record['classType'], record['uc_csuClassType'], repr(float(record['credits'])),
+                  str(int(record['terms'])))
+        entries[(school, class_name)] = separator.join(fields).encode()
+
+    slots = sorted((key_hash(*key), data) for key, data in entries.items())
+    offset = header.size + slot.size * len(slots)
+    table = bytearray()
+    body = bytearray()
+    for hashed, data in slots:
+        table += slot.pack(hashed, offset + len(body), len(data))
+        body += data
+
+    with open(path, 'wb') as f:
+        f.write(header.pack(magic, version, len(slots)))
+        f.write(table)
+        f.write(body)
+
+
+class CatalogLookup:
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        file_magic, file_version, self._count = header.unpack_from(self._map, 0)
+        if file_magic != magic or file_version != version:
+            raise ValueError(f"{path} is not a version {version} catalog lookup file")
+        self._matchers = {}
+
+    def _hash_at(self, i: int) -> int:
+        return slot.unpack_from(self._map, header.size + slot.size * i)[0]
+
+    def names(self, school: str) -> list:
+        """Returns the class names of a school's catalog"""
+        class_names = []
+        for i in range(self._count):
+            _, offset, length = slot.unpack_from(self._map, header.size + slot.size * i)
+            fields = self._map[offset:offset + length].decode().split(separator, 2)
+            if fields[0] == school:
+                class_names.append(fields[1])
+        return class_names
+
+    def get(self, school: str, class_name: str) -> dict or None:
+        """Returns the catalog data of a class, or None if it is not in the catalog"""
+        if not class_name:
+            return None
+        class_name = class_name.strip()
+        hashed = key_hash(school, class_name)
+
+        # Find the first slot with this hash
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._hash_at(middle) < hashed:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Compare keys in case of hash collisions
+        for i in range(low, self._count):
+            slot_hash, offset, length = slot.unpack_from(self._map, header.size + slot.size * i)
+            if slot_hash != hashed:
+                break
+            fields = self._map[offset:offset + length].decode().split(separator)
+            if fields[0] == school and fields[1] == class_name:
+                return {
+                    'class_name': fields[1],
+                    'classType': fields[2],
+                    'uc_csuClassType': fields[3],
+                    'credits': float(fields[4]),
+                    'terms': int(fields[5]),
+                }
+        return None
+
+    def match(self, school: str, class_names: list) -> list:
+        """Looks up a whole sync's class names, falling back to fuzzy matching
+
+        Returns:
+            For each name, its catalog data with the catalog's class_name
+            and the match confidence, or None if nothing matched
+        """
+        results = [self.get(school, class_name) for class_name in class_names]
+        for entry in results:
+            if entry is not None:
+                entry['confidence'] = 1.0
+
+        missing = [i for i, entry in enumerate(results) if entry is None and class_names[i]]
+        if missing:
+            if school not in self._matchers:
+                self._matchers[school] = CatalogMatcher(self.names(school))
+            matches = self._matchers[school].match([class_names[i] for i in missing])
+            for i, (catalog_name, confidence) in zip(missing, matches):
+                if catalog_name is not None:
+                    results[i] = dict(self.get(school, catalog_name), confidence=confidence)
+        return results
+
+    def close(self) -> None:
+        self._map.close()
@@ -0,0 +1,117 @@
+"""Fuzzy matching of scraped class names to catalog class names
+
+PowerSchool names classes differently from the catalog, e.g. "Hon
+Chem" or "AP Calc BC - S1" for "Honors Chemistry" and "AP Calculus BC".
+Names are first normalized into keys: lowercased, abbreviations
+expanded, section markers and filler words removed and words sorted,
+so "AP US History" and "U.S. History AP" share a key. A key that
+equals a catalog key
+is a match with confidence 1. Other keys are compared by their
+character trigrams, found through an inverted index from trigram to
+catalog names, and matched to the name with the highest Dice
+coefficient. Names with numbers only match names with the same
+numbers, so "Spanish 3" never matches "Spanish 2".
+
+    matcher = CatalogMatcher(catalog_class_names)
+    matcher.match(["Hon Chem", "AP Calc BC - S1"])
+"""
+import re
+
+# Words PowerSchool abbreviates, by abbreviation
+abbreviations = {
+    'acc': 'accelerated', 'accel': 'accelerated', 'adv': 'advanced', 'alg': 'algebra', 'amer': 'american',
+    'bio': 'biology', 'calc': 'calculus', 'chem': 'chemistry', 'comp': 'computer', 'econ': 'economics',
+    'eng': 'english', 'env': 'environmental', 'enviro': 'environmental', 'euro': 'european', 'geo': 'geometry',
+    'geom': 'geometry', 'gov': 'government', 'govt': 'government', 'h': 'honors', 'hist': 'history',
+    'hon': 'honors', 'hons': 'honors', 'intro': 'introduction', 'lang': 'language', 'lit': 'literature',
+    'phys': 'physics', 'precalc': 'precalculus', 'psych': 'psychology', 'sci': 'science', 'stat': 'statistics',
+    'stats': 'statistics', 'ii': '2', 'iii': '3', 'iv': '4',
+}
+
+filler_words = {'and', 'for', 'in', 'of', 'the', 'to'}
+
+# Section markers at the end of a name, e.g. "(S1)", "- Sem 2", "Section 03", "P4" or "- 01"
+section_marker = re.compile(r"(?:\s*[-:(]?\s*(?:s[0-3]|sem(?:ester)?\s*\d|sec(?:tion)?\s*\d+|p(?:eriod)?\s*\d+)\)?"
+                            r"|\s*[-:]\s*\d+)$", re.IGNORECASE)
+
+
+def normalize(class_name: str) -> str:
+    """Returns the key a class name is matched by"""
+    name = class_name.strip()
+    while True:
+        stripped = section_marker.sub("", name)
+        if stripped == name:
+            break
+        name = stripped
+    # Join initialisms like "U.S." into one word
+    name = re.sub(r"\b([a-z])\.(?=[a-z]\b)", r"\1", name.lower())
+    words = (abbreviations.get(word, word) for word in re.findall(r"[a-z0-9]+", name))
+    return " ".join(sorted(word for word in words if word not in filler_words))
+
+
+def numbers(key: str) -> tuple:
+    return tuple(word for word in key.split() if word.isdigit())
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogMatcher:
+    def __init__(self, class_names, min_confidence: float = 0.6) -> None:
+        """
+        Args:
+            class_names: class names of the catalog
+            min_confidence: lowest Dice coefficient that counts as a match
+        """
+        self.class_names = list(dict.fromkeys(class_names))
+        self.min_confidence = min_confidence
+        self._by_key = {}
+        self._sizes = []
+        self._numbers = []
+        self._index = {}
+        for i, class_name in enumerate(self.class_names):
+            key = normalize(class_name)
+            self._by_key.setdefault(key, class_name)
+            grams = trigrams(key)
+            self._sizes.append(len(grams))
+            self._numbers.append(numbers(key))
+            for gram in grams:
+                self._index.setdefault(gram, []).append(i)
+
+    def _best(self, key: str) -> tuple:
+        if key in self._by_key:
+            return self._by_key[key], 1.0
+
+        grams = trigrams(key)
+        shared = {}
+        for gram in grams:
+            for i in self._index.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        key_numbers = numbers(key)
+        if key_numbers:
+            shared = {i: count for i, count in shared.items() if self._numbers[i] == key_numbers}
+        if not shared:
+            return None, 0.0
+
+        best = max(shared, key=lambda i: (2 * shared[i] / (len(grams) + self._sizes[i]), -i))
+        confidence = 2 * shared[best] / (len(grams) + self._sizes[best])
+        if confidence < self.min_confidence:
+            return None, confidence
+        return self.class_names[best], confidence
+
+    def match(self, class_names: list) -> list:
+        """Matches a whole sync's class names at once
+
+        Names that normalize to the same key are only matched once.
+
+        Returns:
+            A (catalog class name or None, confidence) pair for each name
+        """
+        keys = [normalize(class_name or "") for class_name in class_names]
+        results = {}
+        for key in keys:
+            if key not in results:
+                results[key] = self._best(key) if key else (None, 0.0)
+        return [results[key] for key in keys]
@@ -0,0 +1,147 @@
+"""Compressed, content-addressed history of downloaded BCP catalogs
+
+Every catalog Catalogger downloads is split into its course cards.
+Each card is stored once, zlib compressed, under the sha256 of its
+HTML, so a new version only costs the cards that changed. A version is
+a small manifest listing its cards' class names and hashes in page
+order:
+
+    catalog_snapshots/
+        objects/ab/ab12...
+        versions/20240105-093000.json
+
+Diffing two versions only compares manifests, so no card is read.
+
+Usage: python server/catalog_snapshots.py list
+       python server/catalog_snapshots.py diff <old version> <new version>
+       python server/catalog_snapshots.py import catalog_old_*.html
+"""
+import hashlib
+import html
+import os
+import re
+import sys
+import time
+import zlib
+
+from json_files import read_json, write_json
+
+card_start = re.compile(r'<div class="card[\s"]')
+card_title = re.compile(r'<div class="h5[^"]*"[^>]*\stitle="([^"]*)"')
+
+
+def split_cards(content: str) -> list:
+    """Splits catalog HTML into the HTML of each course card
+
+    A card runs until the next card starts, so markup between cards
+    stays with the card before it.
+    """
+    starts = [match.start() for match in card_start.finditer(content)]
+    return [content[start:end].strip() for start, end in zip(starts, starts[1:] + [len(content)])]
+
+
+def card_name(card: str) -> str:
+    match = card_title.search(card)
+    return html.unescape(match.group(1)).strip() if match else ""
+
+
+class CatalogSnapshots:
+    def __init__(self, directory: str = "catalog_snapshots") -> None:
+        self.objects = os.path.join(directory, 'objects')
+        self.versions = os.path.join(directory, 'versions')
+
+    def _object_file(self, digest: str) -> str:
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def _manifest(self, version: str) -> dict:
+        manifest = read_json(os.path.join(self.versions, version + '.json'))
+        if manifest is None:
+            raise KeyError(f"No catalog version {version}")
+        return manifest
+
+    def add(self, content: str, created: float or None = None) -> str:
+        """Stores a downloaded catalog
+
+        Args:
+            content: catalog HTML
+            created: when the catalog was downloaded, defaults to now
+
+        Returns:
+            The id of the new version, or of the latest version if nothing changed
+        """
+        cards = []
+        for card in split_cards(content):
+            data = card.encode('utf8')
+            digest = hashlib.sha256(data).hexdigest()
+            path = self._object_file(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(zlib.compress(data, 9))
+                os.replace(tmp_path, path)
+            cards.append([card_name(card), digest])
+
+        versions = self.list_versions()
+        if versions and self._manifest(versions[-1])['cards'] == cards:
+            return versions[-1]
+
+        created = time.time() if created is None else created
+        version = time.strftime('%Y%m%d-%H%M%S', time.localtime(created))
+        while version in versions:
+            version += '-1'
+        write_json(os.path.join(self.versions, version + '.json'), {'created': created, 'cards': cards})
+        return version
+
+    def list_versions(self) -> list:
+        """Returns version ids from oldest to newest"""
+        try:
+            files = os.listdir(self.versions)
+        except FileNotFoundError:
+            return []
+        return sorted(file[:-len('.json')] for file in files if file.endswith('.json'))
+
+    def cards(self, version: str) -> list:
+        """Returns (class name, card hash) pairs of a version in page order"""
+        return [tuple(card) for card in self._manifest(version)['cards']]
+
+    def load_version(self, version: str):
+        """Yields the HTML of each card of a version in page order"""
+        for _, digest in self._manifest(version)['cards']:
+            with open(self._object_file(digest), 'rb') as f:
+                yield zlib.decompress(f.read()).decode('utf8')
+
+    def diff(self, old: str, new: str) -> dict:
+        """Compares the courses of two versions by class name
+
+        Returns:
+            Class names that were added, removed, or whose card changed
+        """
+        old_cards = dict(self.cards(old))
+        new_cards = dict(self.cards(new))
+        return {
+            'added': sorted(new_cards.keys() - old_cards.keys()),
+            'removed': sorted(old_cards.keys() - new_cards.keys()),
+            'changed': sorted(name for name in old_cards.keys() & new_cards.keys()
+                              if old_cards[name] != new_cards[name]),
+        }
+
+
+if __name__ == "__main__":
+    snapshots = CatalogSnapshots()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        for version_id in snapshots.list_versions():
+            print(f"{version_id}: {len(snapshots.cards(version_id))} classes")
+    elif command == "diff":
+        for change, names in snapshots.diff(sys.argv[2], sys.argv[3]).items():
+            for name in names:
+                print(f"{change}: {name}")
+    elif command == "import":
+        # Adds old full copies of the catalog to the store, oldest first
+        for fname in sorted(sys.argv[2:], key=os.path.getmtime):
+            with open(fname, encoding='utf8') as f:
+                print(f"{fname} -> {snapshots.add(f.read(), os.path.getmtime(fname))}")
+    else:
+        print(f"Unknown command {command}")
+        sys.exit(1)
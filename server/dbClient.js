@@ -2885,6 +2885,12 @@ const _logGeneralError = async (db, errorString) => {
     return {success: true, data: {value: errorCode}};
 };
 
+// Partial results leave out classes that failed or ran out of time, so their stored copies are kept
+const _keepMissingClasses = (oldClasses, newClasses, key = "class_name") => {
+    let newNames = newClasses.map(c => c[key]);
+    return newClasses.concat((oldClasses ?? []).filter(c => !newNames.includes(c[key])));
+};
+
 const updateGrades = (username, schoolPassword, userPassword, gradeSync) => safe(_updateGrades, lower(username), schoolPassword, userPassword, gradeSync);
 const _updateGrades = async (db, username, schoolPassword, userPassword, gradeSync) => {
     let res = await getUser(username, {"alerts.lastUpdated": {$slice: -1}, grades: 1, school: 1, updatedGradeHistory: 1, schoolUsername: 1, donoData: 1});
@@ -2942,6 +2948,8 @@ const _updateGrades = async (db, username, schoolPassword, userPassword, gradeSy
                 await setSyncStatus(username, SyncStatus.FAILED);
             } else if (data.message === "Something went wrong.") {
                 await setSyncStatus(username, SyncStatus.FAILED);
+            } else if (data.message === "Sync ran out of time." || data.message === "Sync ran out of memory.") {
+                await setSyncStatus(username, SyncStatus.FAILED);
             } else if (data.message.startsWith("Error: ")) {
                 let code = (await logError(username, data.message.substring(7))).data.value;
                 await setSyncStatus(username, `${SyncStatus.FAILED}-${code}`);
@@ -2963,6 +2971,9 @@ const _updateGrades = async (db, username, schoolPassword, userPassword, gradeSy
                 await _users(db, username).updateOne({username: username}, {$set: {[`grades.${newTerm}`]: {}}});
             }
             let newGrades = data["new_grades"][newTerm][newSemester];
+            if (data.partial && newTerm in user.grades) {
+                newGrades = _keepMissingClasses(user.grades[newTerm][newSemester], newGrades);
+            }
             let newClasses = newGrades.map(c => c.class_name);
             let oldPSAIDs = [];
             let oldGrades;
@@ -3050,8 +3061,15 @@ const _updateGrades = async (db, username, schoolPassword, userPassword, gradeSy
             };
             if (user.school === Schools.BISV) {
                 newGrades = data["new_grades"][newTerm];
-                await _users(db, username).updateOne({username: username}, {$set: {[`grades.${newTerm}`]: newGrades}});
                 let newWeights = data["new_weights"][newTerm];
+                if (data.partial && newTerm in user.grades) {
+                    let oldWeights = (await getUser(username, {[`weights.${newTerm}`]: 1})).data.value.weights?.[newTerm] ?? {};
+                    for (let trimester of new Set([...Object.keys(user.grades[newTerm]), ...Object.keys(newGrades)])) {
+                        newGrades[trimester] = _keepMissingClasses(user.grades[newTerm][trimester], newGrades[trimester] ?? []);
+                        newWeights[trimester] = _keepMissingClasses(oldWeights[trimester], newWeights[trimester] ?? [], "className");
+                    }
+                }
+                await _users(db, username).updateOne({username: username}, {$set: {[`grades.${newTerm}`]: newGrades}});
                 await _users(db, username).updateOne({username: username}, {$set: {[`weights.${newTerm}`]: newWeights}});
             } else {
                 await _users(db, username).updateOne({username: username}, {$set: {[`grades.${newTerm}.${newSemester}`]: newGrades}});
@@ -3561,6 +3579,23 @@ const _updateClassesForUser = async (db, username, term, semester, className) =>
     return {success: true};
 };
 
+// Grades stored by the scraper's MongoSink (mongo_sink.py) leave the classes collection to us
+const finishStoredSyncs = (username) => safe(_finishStoredSyncs, lower(username));
+const _finishStoredSyncs = async (db, username) => {
+    let res = await getUser(username, {pendingClassUpdates: 1});
+    if (!res.success) {
+        return res;
+    }
+    let pending = res.data.value.pendingClassUpdates ?? [];
+    for (let {term, semester} of pending) {
+        await updateClassesForUser(username, term, semester);
+    }
+    if (pending.length) {
+        await _users(db, username).updateOne({username: username}, {$pull: {pendingClassUpdates: {$in: pending}}});
+    }
+    return {success: true};
+};
+
 const updateAddedAssignments = (username, addedAssignments, term, semester) => safe(_updateAddedAssignments, lower(username), addedAssignments, term, semester);
 const _updateAddedAssignments = async (db, username, addedAssignments, term, semester) => {
     let res = await getUser(username, {
@@ -5424,6 +5459,7 @@ module.exports = {
     initWeights: initWeights,
     initAddedWeights: initAddedWeights,
     updateClassesForUser: updateClassesForUser,
+    finishStoredSyncs: finishStoredSyncs,
     updateAddedAssignments: updateAddedAssignments,
     updateEditedAssignments: updateEditedAssignments,
     getSyncStatus: getSyncStatus,
@@ -0,0 +1,261 @@
+"""Grade analytics over whole syncs in vectorized NumPy passes
+
+Loads every assignment of a sync, or of many syncs, into flat arrays
+once. Category grades, overall grades, letter grades, what-if grades and
+GPAs for every class of every term are then computed with a few
+bincount passes instead of a loop per class and category. The math is
+the same as the grade calculations in views/user/authorized_index.ejs:
+
+    category grade: points gotten / points possible of the category's graded,
+        not excluded assignments, rounded to hundredths
+    overall grade: weighted mean of the category grades when the class has
+        weights, otherwise the points based grade of all its assignments
+    GPA: A=4 through D=1 and F=0 per class, +1 for AP and honors classes
+        when weighted. False, CR and W grades are left out.
+
+    table = AssignmentTable.from_grades(result['new_grades'], result.get('new_weights'))
+    table.summary()
+"""
+import numpy as np
+
+# Lowest percent of each letter grade, highest first
+letter_cutoffs = [(97.5, "A+"), (92.5, "A"), (89.5, "A-"), (87.5, "B+"), (82.5, "B"), (79.5, "B-"), (77.5, "C+"),
+                  (72.5, "C"), (69.5, "C-"), (67.5, "D+"), (62.5, "D"), (59.5, "D-"), (0, "F")]
+grade_points = {"A": 4, "B": 3, "C": 2, "D": 1}
+# Letter grades GPAs leave out
+ungraded_letters = {False, None, "", "CR", "W"}
+weighted_class_types = {"ap", "honors"}
+
+
+def round_hundredths(values: np.ndarray) -> np.ndarray:
+    """Rounds half up like Math.round(x * 100) / 100"""
+    return np.floor(values * 100 + 0.5) / 100
+
+
+def letter_grades(percents: np.ndarray) -> list:
+    """Returns the letter grade of each percent, False where the percent is NaN or negative"""
+    cutoffs = np.array([cutoff for cutoff, _ in reversed(letter_cutoffs)])
+    letters = [letter for _, letter in reversed(letter_cutoffs)]
+    positions = np.searchsorted(cutoffs, percents, side='right') - 1
+    return [letters[position] if position >= 0 and not np.isnan(percent) else False
+            for position, percent in zip(positions.tolist(), percents.tolist())]
+
+
+def _points(value) -> float:
+    # Ungraded points are stored as False
+    if value is False or value is None:
+        return np.nan
+    return value
+
+
+class AssignmentTable:
+    def __init__(self) -> None:
+        # One entry per class: (term, semester, class_name)
+        self.classes = []
+        self.overall_letters = []
+        self.class_types = []
+        # One entry per (class, category) slot
+        self.slot_class = []
+        self.slot_category = []
+        self._weights = []
+        self._has_weights = []
+        # One entry per assignment
+        self.psaids = []
+        self._assignment_slot = []
+        self._gotten = []
+        self._possible = []
+        self._exclude = []
+        self._rows_by_psaid = None
+
+    @classmethod
+    def from_grades(cls, grades: dict, weights: dict or None = None, as_dict=None) -> 'AssignmentTable':
+        """Loads one sync's grades
+
+        Args:
+            grades: terms mapped to semesters mapped to classes, like new_grades of a scrape result
+            weights: terms mapped to semesters mapped to class weights, like new_weights of a Basis result
+            as_dict: turns class records into dictionaries, if they are not already
+        """
+        return cls.from_syncs([(grades, weights)], as_dict)
+
+    @classmethod
+    def from_syncs(cls, syncs, as_dict=None) -> 'AssignmentTable':
+        """Loads the grades of many syncs into one table
+
+        Args:
+            syncs: (grades, weights) pairs, see from_grades
+            as_dict: turns class records into dictionaries, if they are not already
+        """
+        table = cls()
+        for grades, weights in syncs:
+            table._add_sync(grades, weights or {}, as_dict)
+        table._freeze()
+        return table
+
+    def _new_slot(self, class_index: int, category: str, weight: float or None = None) -> int:
+        self.slot_class.append(class_index)
+        self.slot_category.append(category)
+        self._weights.append(np.nan if weight is None else weight)
+        return len(self.slot_class) - 1
+
+    def _add_sync(self, grades: dict, weights: dict, as_dict) -> None:
+        for term, semesters in grades.items():
+            for semester, classes in semesters.items():
+                class_weights = {entry['className']: entry for entry in weights.get(term, {}).get(semester, ())}
+                for local_class in classes:
+                    if not isinstance(local_class, dict):
+                        local_class = as_dict(local_class)
+                    class_index = len(self.classes)
+                    class_name = local_class['class_name']
+                    self.classes.append((term, semester, class_name))
+                    self.overall_letters.append(local_class.get('overall_letter'))
+                    self.class_types.append((local_class.get('catalog') or {}).get('classType'))
+
+                    entry = class_weights.get(class_name)
+                    self._has_weights.append(bool(entry and entry.get('hasWeights')))
+                    # Categories of the weights come first, like classCategories on the page
+                    slots = {category: self._new_slot(class_index, category, weight)
+                             for category, weight in (entry['weights'].items() if entry else ())}
+
+                    assignments = local_class['grades']
+                    for assignment in assignments:
+                        if assignment['category'] not in slots:
+                            slots[assignment['category']] = self._new_slot(class_index, assignment['category'])
+                    self.psaids.extend([assignment.get('psaid') for assignment in assignments])
+                    self._assignment_slot.extend([slots[assignment['category']] for assignment in assignments])
+                    self._gotten.extend([_points(assignment.get('points_gotten')) for assignment in assignments])
+                    self._possible.extend([_points(assignment.get('points_possible')) for assignment in assignments])
+                    self._exclude.extend([bool(assignment.get('exclude')) for assignment in assignments])
+
+    def _freeze(self) -> None:
+        self.slot_class = np.array(self.slot_class, dtype=np.int64)
+        self.weights = np.array(self._weights, dtype=np.float64)
+        self.has_weights = np.array(self._has_weights, dtype=bool)
+        self.assignment_slot = np.array(self._assignment_slot, dtype=np.int64)
+        self.assignment_class = self.slot_class[self.assignment_slot]
+        self.gotten = np.array(self._gotten, dtype=np.float64)
+        self.possible = np.array(self._possible, dtype=np.float64)
+        self.exclude = np.array(self._exclude, dtype=bool)
+        del self._weights, self._has_weights, self._assignment_slot, self._gotten, self._possible, self._exclude
+
+    def _included(self, gotten: np.ndarray) -> np.ndarray:
+        """Assignments that count: graded and not excluded"""
+        return ~self.exclude & ~np.isnan(gotten) & ~np.isnan(self.possible)
+
+    def category_grades(self, gotten: np.ndarray or None = None) -> np.ndarray:
+        """Returns the grade of every (class, category) slot, NaN where nothing counts
+
+        Args:
+            gotten: points gotten to use instead of the scraped ones, for what-if grades
+        """
+        gotten = self.gotten if gotten is None else gotten
+        included = self._included(gotten)
+        slots = len(self.slot_class)
+        gotten_sums = np.bincount(self.assignment_slot[included], gotten[included], minlength=slots)
+        possible_sums = np.bincount(self.assignment_slot[included], self.possible[included], minlength=slots)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            grades = round_hundredths(gotten_sums / possible_sums * 100)
+        grades[possible_sums == 0] = np.nan
+        return grades
+
+    def overall_grades(self, gotten: np.ndarray or None = None) -> np.ndarray:
+        """Returns the overall percent of every class, NaN where nothing counts
+
+        Args:
+            gotten: points gotten to use instead of the scraped ones, for what-if grades
+        """
+        gotten = self.gotten if gotten is None else gotten
+        classes = len(self.classes)
+
+        # Points based, for classes without weights
+        included = self._included(gotten)
+        earned = np.bincount(self.assignment_class[included], gotten[included], minlength=classes)
+        total = np.bincount(self.assignment_class[included], self.possible[included], minlength=classes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            points_based = earned / total * 100
+        points_based[total == 0] = np.nan
+
+        # Weighted mean of the graded categories, a missing weight counts as 0
+        category = self.category_grades(gotten)
+        graded = ~np.isnan(category)
+        weights = np.nan_to_num(self.weights)
+        weighted_sum = np.bincount(self.slot_class[graded], category[graded] * weights[graded], minlength=classes)
+        weight_total = np.bincount(self.slot_class[graded], weights[graded], minlength=classes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted = weighted_sum / weight_total
+        weighted[weight_total == 0] = np.nan
+
+        return np.where(self.has_weights, weighted, points_based)
+
+    def what_if(self, scores: dict) -> np.ndarray:
+        """Returns the overall grades if some assignments had other scores
+
+        Args:
+            scores: psaid mapped to the points gotten to assume, False for ungraded. Every
+                assignment with the psaid changes, so load one account's syncs to use this.
+        """
+        if self._rows_by_psaid is None:
+            self._rows_by_psaid = {}
+            for row, psaid in enumerate(self.psaids):
+                self._rows_by_psaid.setdefault(psaid, []).append(row)
+        gotten = self.gotten.copy()
+        for psaid, points in scores.items():
+            gotten[self._rows_by_psaid.get(psaid, [])] = _points(points)
+        return self.overall_grades(gotten)
+
+    def excluded_counts(self) -> np.ndarray:
+        """Returns how many assignments of each class are excluded from its grade"""
+        return np.bincount(self.assignment_class[self.exclude], minlength=len(self.classes))
+
+    def gpas(self, weighted: bool = False, class_types: dict or None = None) -> dict:
+        """Returns the GPA and highest possible GPA of every semester and of all of them
+
+        A class's scraped letter grade is used when it has one, otherwise the
+        letter of its calculated overall grade.
+
+        Args:
+            weighted: add a point for AP and honors classes
+            class_types: class name mapped to catalog classType, for classes without catalog data
+
+        Returns:
+            (term, semester) and "cumulative" mapped to a (gpa, max) pair, or None without graded classes
+        """
+        computed = letter_grades(self.overall_grades())
+        letters = [letter or computed[i] for i, letter in enumerate(self.overall_letters)]
+        counted = np.array([letter not in ungraded_letters for letter in letters], dtype=bool)
+        points = np.array([grade_points.get(letter[0], 0) if counted[i] else 0 for i, letter in enumerate(letters)],
+                          dtype=np.float64)
+        maxes = np.full(len(letters), 4.0)
+        if weighted:
+            class_types = class_types or {}
+            bonus = np.array([(class_type or class_types.get(class_name)) in weighted_class_types
+                              for (_, _, class_name), class_type in zip(self.classes, self.class_types)], dtype=bool)
+            points += bonus
+            maxes += bonus
+
+        semesters = sorted({(term, semester) for term, semester, _ in self.classes})
+        semester_index = {key: i for i, key in enumerate(semesters)}
+        groups = np.array([semester_index[(term, semester)] for term, semester, _ in self.classes], dtype=np.int64)
+        counts = np.bincount(groups[counted], minlength=len(semesters))
+        point_sums = np.bincount(groups[counted], points[counted], minlength=len(semesters))
+        max_sums = np.bincount(groups[counted], maxes[counted], minlength=len(semesters))
+
+        result = {key: (float(point_sums[i] / counts[i]), float(max_sums[i] / counts[i])) if counts[i] else None
+                  for i, key in enumerate(semesters)}
+        total = counts.sum()
+        result["cumulative"] = (float(point_sums.sum() / total), float(max_sums.sum() / total)) if total else None
+        return result
+
+    def summary(self) -> list:
+        """Returns the calculated grades of every class as dictionaries"""
+        overall = self.overall_grades()
+        letters = letter_grades(overall)
+        category = self.category_grades().tolist()
+        excluded = self.excluded_counts()
+        categories = [{} for _ in self.classes]
+        for slot, class_index in enumerate(self.slot_class.tolist()):
+            categories[class_index][self.slot_category[slot]] = None if np.isnan(category[slot]) else category[slot]
+        return [{'term': term, 'semester': semester, 'class_name': class_name,
+                 'overall_percent': None if np.isnan(overall[i]) else float(overall[i]),
+                 'overall_letter': letters[i], 'categories': categories[i], 'excluded': int(excluded[i])}
+                for i, (term, semester, class_name) in enumerate(self.classes)]
@@ -0,0 +1,246 @@
+"""Columnar export of scraped assignments for analytics
+
+Scrape results nest assignments in terms, semesters and classes, so
+every analytic has to walk the whole structure again. A ColumnWriter
+flattens the assignments of one sync or of a whole batch into one row
+each:
+
+    account, term, semester, class_name, teacher_name, category,
+        assignment_name, psaid: dictionary encoded strings
+    date: datetime64[D], NaT when missing
+    points_gotten, points_possible, grade_percent: float64, NaN when ungraded
+    exclude: bool
+
+Dictionary encoded columns are stored as int32 codes into a table of
+their distinct values, -1 for missing. They are written either as a
+directory of .npy files, which load memory-mapped so a scan only reads
+the columns it uses, or as a Parquet file when the path ends in
+.parquet and pyarrow is installed.
+
+Usage: python server/grade_columns.py export <results.jsonl> <directory or file.parquet>
+       python server/grade_columns.py info <directory or file.parquet>
+
+results.jsonl holds scrape.py or batch.py output; only result lines are used.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+dictionary_columns = ('account', 'term', 'semester', 'class_name', 'teacher_name', 'category', 'assignment_name',
+                      'psaid')
+float_columns = ('points_gotten', 'points_possible', 'grade_percent')
+manifest_fname = "manifest.json"
+date_formats = ("%m/%d/%Y", "%m/%d/%y")
+
+
+def parse_date(date: str or None) -> np.datetime64:
+    for date_format in date_formats:
+        try:
+            return np.datetime64(datetime.strptime(date, date_format).date(), 'D')
+        except (TypeError, ValueError):
+            continue
+    return np.datetime64('NaT', 'D')
+
+
+def _number(value) -> float:
+    # Ungraded points are stored as False
+    if value is False or value is None:
+        return np.nan
+    return value
+
+
+class ColumnWriter:
+    def __init__(self) -> None:
+        self.rows = 0
+        # Distinct values of each dictionary column, mapped to their codes
+        self._dictionaries = {name: {} for name in dictionary_columns}
+        self._codes = {name: [] for name in dictionary_columns}
+        self._floats = {name: [] for name in float_columns}
+        self._dates = []
+        self._exclude = []
+
+    def _encode(self, name: str, value) -> int:
+        if value is None or value is False:
+            return -1
+        dictionary = self._dictionaries[name]
+        value = str(value)
+        code = dictionary.get(value)
+        if code is None:
+            code = dictionary[value] = len(dictionary)
+        return code
+
+    def add(self, grades: dict, account=None, as_dict=None) -> int:
+        """Adds the assignments of one sync
+
+        Args:
+            grades: terms mapped to semesters mapped to classes, like new_grades of a scrape result
+            account: what the account column holds for these rows, e.g. a batch account id
+            as_dict: turns class records into dictionaries, if they are not already
+
+        Returns:
+            The number of assignments added
+        """
+        start = self.rows
+        account_code = self._encode('account', account)
+        for term, semesters in grades.items():
+            term_code = self._encode('term', term)
+            for semester, classes in semesters.items():
+                semester_code = self._encode('semester', semester)
+                for local_class in classes:
+                    if not isinstance(local_class, dict):
+                        local_class = as_dict(local_class)
+                    assignments = local_class['grades']
+                    count = len(assignments)
+                    self._codes['account'].extend([account_code] * count)
+                    self._codes['term'].extend([term_code] * count)
+                    self._codes['semester'].extend([semester_code] * count)
+                    self._codes['class_name'].extend([self._encode('class_name', local_class['class_name'])] * count)
+                    self._codes['teacher_name'].extend(
+                        [self._encode('teacher_name', local_class.get('teacher_name'))] * count)
+                    for name in ('category', 'assignment_name', 'psaid'):
+                        self._codes[name].extend([self._encode(name, assignment.get(name))
+                                                  for assignment in assignments])
+                    for name in float_columns:
+                        self._floats[name].extend([_number(assignment.get(name)) for assignment in assignments])
+                    self._dates.extend([assignment.get('date') for assignment in assignments])
+                    self._exclude.extend([bool(assignment.get('exclude')) for assignment in assignments])
+                    self.rows += count
+        return self.rows - start
+
+    def columns(self) -> tuple:
+        """Returns the columns as arrays and the distinct values of each dictionary column"""
+        columns = {name: np.array(codes, dtype=np.int32) for name, codes in self._codes.items()}
+        columns.update({name: np.array(values, dtype=np.float64) for name, values in self._floats.items()})
+        # Dates repeat a lot, so each distinct one is only parsed once
+        distinct_dates = {date: parse_date(date) for date in set(self._dates)}
+        columns['date'] = np.array([distinct_dates[date] for date in self._dates], dtype='datetime64[D]')
+        columns['exclude'] = np.array(self._exclude, dtype=bool)
+        dictionaries = {name: np.array(list(values), dtype=str) for name, values in self._dictionaries.items()}
+        return columns, dictionaries
+
+    def write(self, path: str) -> int:
+        """Writes every added assignment to a .npy directory, or a Parquet file if path ends in .parquet
+
+        Returns:
+            The number of rows written
+        """
+        columns, dictionaries = self.columns()
+        if path.endswith('.parquet'):
+            _write_parquet(path, columns, dictionaries)
+        else:
+            _write_npy(path, columns, dictionaries)
+        return self.rows
+
+
+def _write_npy(directory: str, columns: dict, dictionaries: dict) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(directory, name + '.npy'), values)
+    for name, values in dictionaries.items():
+        np.save(os.path.join(directory, name + '.values.npy'), values)
+    # Written last, so a directory with a manifest is complete
+    with open(os.path.join(directory, manifest_fname), 'w') as f:
+        json.dump({'rows': len(columns['exclude']), 'columns': list(columns),
+                   'dictionary_columns': list(dictionaries)}, f)
+
+
+def _write_parquet(path: str, columns: dict, dictionaries: dict) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = {}
+    for name, values in columns.items():
+        if name in dictionaries:
+            indices = pa.array(values, mask=values < 0)
+            arrays[name] = pa.DictionaryArray.from_arrays(indices, pa.array(dictionaries[name], type=pa.string()))
+        else:
+            arrays[name] = pa.array(values)
+    pq.write_table(pa.table(arrays), path)
+
+
+class GradeColumns:
+    """Assignment columns loaded from a ColumnWriter export
+
+    Attributes:
+        rows: number of assignments
+        columns: column name mapped to its array, codes for dictionary columns
+        dictionaries: dictionary column name mapped to its distinct values
+    """
+
+    def __init__(self, columns: dict, dictionaries: dict) -> None:
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.rows = len(columns['exclude'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def code(self, name: str, value: str) -> int:
+        """Returns the code of a value of a dictionary column, -1 if no row has it"""
+        matches = np.flatnonzero(self.dictionaries[name] == value)
+        return int(matches[0]) if len(matches) else -1
+
+    def decode(self, name: str) -> np.ndarray:
+        """Returns the values of a dictionary column, None where missing"""
+        values = np.append(self.dictionaries[name].astype(object), None)
+        return values[self.columns[name]]
+
+
+def load(path: str) -> GradeColumns:
+    """Loads an export, memory-mapped when possible"""
+    if path.endswith('.parquet'):
+        return _load_parquet(path)
+    with open(os.path.join(path, manifest_fname)) as f:
+        manifest = json.load(f)
+    columns = {name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in manifest['columns']}
+    dictionaries = {name: np.load(os.path.join(path, name + '.values.npy'), mmap_mode='r')
+                    for name in manifest['dictionary_columns']}
+    return GradeColumns(columns, dictionaries)
+
+
+def _load_parquet(path: str) -> GradeColumns:
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, memory_map=True)
+    columns = {}
+    dictionaries = {}
+    for name in table.column_names:
+        column = table.column(name).combine_chunks()
+        if name in dictionary_columns:
+            columns[name] = column.indices.fill_null(-1).to_numpy().astype(np.int32)
+            dictionaries[name] = np.array(column.dictionary.to_pylist(), dtype=str)
+        else:
+            columns[name] = column.to_numpy(zero_copy_only=False)
+    return GradeColumns(columns, dictionaries)
+
+
+def read_results(lines):
+    """Yields (account, new_grades) of each successful result line of scrape.py or batch.py output"""
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        message = json.loads(line)
+        if message.get('success') and 'new_grades' in message:
+            yield message.get('id', i), message['new_grades']
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "export":
+        writer = ColumnWriter()
+        with open(sys.argv[2]) as f:
+            for account_id, new_grades in read_results(f):
+                writer.add(new_grades, account_id)
+        print(f"Wrote {writer.write(sys.argv[3])} assignments to {sys.argv[3]}")
+    elif command == "info":
+        grade_columns = load(sys.argv[2])
+        print(f"{grade_columns.rows} assignments")
+        for name in dictionary_columns:
+            print(f"{name}: {len(grade_columns.dictionaries[name])} distinct values")
+    else:
+        print(f"Unknown command {command}")
+        sys.exit(1)
@@ -0,0 +1,185 @@
+"""Running-grade series of each class, for the grade charts
+
+The charts on the user page plot a class's overall grade after each of
+its graded, not excluded assignments, in the order the assignments are
+listed. running_series precomputes those points with the same math as
+views/user/authorized_index.ejs, so the page only has to read them:
+
+    points based classes: the running points gotten / points possible of all
+        graded assignments, rounded to hundredths
+    weighted classes: the weighted mean of the running category grades,
+        counting only categories that have a graded assignment so far
+
+A series remembers how many assignments it covered, a digest of them
+and the running totals. When the next sync only appended assignments,
+the series continues from those totals instead of starting over.
+
+    {"class_name": "...", "i": [0, 2, ...], "y": [92.5, 93.1, ...],
+     "state": {"n": 40, "key": "...", "totals": {...}, "total_weight": 100, "last": 93.1}}
+
+i holds the index in the class's grades of the assignment each point y
+belongs to. Only the charts' own timestamps are left to the page.
+
+Like on the page, a class is weighted unless its weights say
+hasWeights: false or one of them is missing, and the user's added
+weights count too. The weights are the scraped ones of a Basis class,
+or else the user's stored ones. A class with neither is sent as
+{"class_name": "...", "precomputed": false} so the page computes its
+chart itself.
+"""
+import copy
+import hashlib
+import json
+import math
+
+# Weight of the only category of classes without weights
+default_weight = 100
+
+
+def _round_hundredths(value: float) -> float:
+    """Rounds half up like Math.round(x * 100) / 100"""
+    return math.floor(value * 100 + 0.5) / 100
+
+
+def _field(record, name: str):
+    # Classes and assignments are scraper records, or dictionaries once they went through JSON
+    if isinstance(record, dict):
+        return record.get(name, False)
+    return getattr(record, name, False)
+
+
+def _fingerprint(assignment) -> bytes:
+    return repr(tuple(_field(assignment, name) for name in ('psaid', 'date', 'category', 'exclude', 'points_gotten',
+                                                             'points_possible'))).encode('utf8')
+
+
+def _missing(weight) -> bool:
+    # The page counts a category as missing when !weight && weight !== 0
+    return weight is None or weight is False or weight == ""
+
+
+def _digest(weights: dict or None) -> 'hashlib.blake2b':
+    # Different weights give different grades, so they start the digest
+    return hashlib.blake2b(json.dumps(weights, sort_keys=True).encode('utf8'), digest_size=16)
+
+
+def running_series(local_class, class_weights: dict or None = None, previous: dict or None = None,
+                   added_weights: dict or None = None) -> dict:
+    """Returns the running-grade series of a class
+
+    Args:
+        local_class: a class of a scrape result, as a record or a dictionary
+        class_weights: the class's weights, like {"className": ..., "hasWeights": ..., "weights": {...}}
+        previous: the class's series from the last sync, continued if the class only gained assignments since
+        added_weights: the class's added weights, like the weights of its addedWeights entry
+    """
+    assignments = _field(local_class, 'grades') or []
+    class_weights = class_weights or {}
+    weights = {**(added_weights or {}), **(class_weights.get('weights') or {})}
+    # Classes with a missing weight are charted points based, see unobtainedWeights on the page
+    weighted = class_weights.get('hasWeights') is not False and not any(map(_missing, weights.values()))
+    weights = weights if weighted else None
+
+    digest = _digest(weights)
+    state = None
+    if previous is not None and previous['state']['n'] <= len(assignments):
+        covered = previous['state']['n']
+        for assignment in assignments[:covered]:
+            digest.update(_fingerprint(assignment))
+        if digest.hexdigest() == previous['state']['key']:
+            state = copy.deepcopy(previous['state'])
+            indices = list(previous['i'])
+            points = list(previous['y'])
+    if state is None:
+        digest = _digest(weights)
+        state = {'n': 0, 'totals': {}, 'total_weight': 0, 'last': None}
+        indices = []
+        points = []
+
+    totals = state['totals']
+    for index in range(state['n'], len(assignments)):
+        assignment = assignments[index]
+        digest.update(_fingerprint(assignment))
+        points_gotten = _field(assignment, 'points_gotten')
+        points_possible = _field(assignment, 'points_possible')
+        if _field(assignment, 'exclude') or points_gotten is False or points_gotten is None:
+            # Left out of the chart
+            continue
+        if points_possible is False or points_possible is None:
+            # Charted at the last grade, or 100 before the first one
+            points.append(state['last'] or 100)
+            indices.append(index)
+            continue
+
+        category = _field(assignment, 'category') if weighted else "default"
+        if category not in totals:
+            weight = (weights.get(category) or 0) if weighted else default_weight
+            totals[category] = [0, 0, weight]
+            state['total_weight'] += weight
+        totals[category][0] += points_gotten
+        totals[category][1] += points_possible
+
+        overall = 0
+        for category_totals in totals.values():
+            gotten, possible, weight = category_totals
+            if gotten == 0 and possible == 0:
+                # A category with nothing to grade stops counting, like on the page
+                state['total_weight'] -= weight
+                category_totals[2] = 0
+                continue
+            overall += weight * (_round_hundredths(gotten / possible * 100) if possible != 0 else 100)
+        grade = _round_hundredths(overall / state['total_weight']) if state['total_weight'] else None
+        points.append(grade)
+        indices.append(index)
+        # The page falls back to the last truthy grade
+        if grade:
+            state['last'] = grade
+
+    state['n'] = len(assignments)
+    state['key'] = digest.hexdigest()
+    return {'class_name': _field(local_class, 'class_name'), 'i': indices, 'y': points, 'state': state}
+
+
+def _by_class(weights: dict, term: str, semester: str) -> dict:
+    return {entry['className']: entry for entry in (weights.get(term) or {}).get(semester) or ()}
+
+
+def series_for_grades(grades: dict, weights: dict or None = None, previous: dict or None = None,
+                      stored_weights: dict or None = None) -> dict:
+    """Returns the running-grade series of every class of a scrape result
+
+    Args:
+        grades: terms mapped to semesters mapped to classes, like new_grades of a scrape result
+        weights: terms mapped to semesters mapped to class weights, like new_weights of a Basis result
+        previous: the series sent with the last result of the account, if any
+        stored_weights: the user's weights and addedWeights like in their user document, as
+            {"weights": {...}, "addedWeights": {...}}
+
+    Returns:
+        Terms mapped to semesters mapped to a list of series, one per class in the same order
+    """
+    weights = weights or {}
+    previous = previous or {}
+    stored_weights = stored_weights or {}
+    series = {}
+    for term, semesters in grades.items():
+        series[term] = {}
+        for semester, classes in semesters.items():
+            class_weights = _by_class(weights, term, semester)
+            user_weights = _by_class(stored_weights.get('weights') or {}, term, semester)
+            added_weights = _by_class(stored_weights.get('addedWeights') or {}, term, semester)
+            previous_series = {}
+            for entry in previous.get(term, {}).get(semester, ()):
+                if 'state' in entry:
+                    previous_series.setdefault(entry['class_name'], entry)
+            series[term][semester] = []
+            for local_class in classes:
+                class_name = _field(local_class, 'class_name')
+                entry = class_weights.get(class_name) or user_weights.get(class_name)
+                if entry is None:
+                    # Without its weights the class could be charted either way
+                    series[term][semester].append({'class_name': class_name, 'precomputed': False})
+                    continue
+                series[term][semester].append(running_series(local_class, entry, previous_series.get(class_name),
+                                                             (added_weights.get(class_name) or {}).get('weights')))
+    return series
@@ -0,0 +1,218 @@
+"""On-disk storage for PowerSchool grade history
+
+School years that have ended never change on PowerSchool, so their
+scraped data is kept per user and reused by later history syncs
+instead of fetching every class page again. History imports also
+checkpoint their progress here so a failed import can be resumed.
+
+Set HISTORY_CACHE_DIR to enable it. HISTORY_CHECKPOINT_MAX_AGE sets
+how many seconds after it started a checkpoint can still be resumed,
+6 hours by default.
+
+The files hold a student's grades as plain JSON, so the directory
+should only be readable by the server. Each user's files live in one
+directory named by user_key, which hashes the school and username.
+Stored years are dropped HISTORY_CACHE_MAX_AGE seconds after they were
+written, 30 days by default, and are fetched again by the next history
+sync. Years of users who stop syncing are removed by running
+
+    python history_cache.py expire
+
+periodically. When an account is deleted, remove its files with
+
+    python history_cache.py purge <school> <school username>
+"""
+import hashlib
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+from json_files import read_json, write_json
+
+history_cache_dir = os.getenv("HISTORY_CACHE_DIR")
+# Older checkpoints are thrown away, so grades of a year still in progress are never reused for long
+checkpoint_max_age = float(os.getenv("HISTORY_CHECKPOINT_MAX_AGE", 6 * 60 * 60))
+# Stored years are fetched again after this long, so no user's grades are kept indefinitely
+cache_max_age = float(os.getenv("HISTORY_CACHE_MAX_AGE", 30 * 24 * 60 * 60))
+
+
+def is_finished_year(year: str, now: datetime or None = None) -> bool:
+    """Checks if a school year like "22-23" has ended
+
+    A year counts as finished from July 1st of the year it ends in.
+    """
+    try:
+        end_year = 2000 + int(year.split('-')[1])
+    except (IndexError, ValueError):
+        return False
+    return (now or datetime.now()) >= datetime(end_year, 7, 1)
+
+
+def user_key(school: str, user: str) -> str:
+    """Returns a file-safe key for a user that does not contain their username"""
+    return hashlib.sha256(f"{school}:{user.lower()}".encode()).hexdigest()
+
+
+def _expired(path: str, max_age: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) > max_age
+    except OSError:
+        return False
+
+
+def purge_user(school: str, user: str, directory: str or None = None) -> bool:
+    """Removes everything stored for a user, e.g. when their account is deleted
+
+    Returns:
+        True if anything was stored for the user
+    """
+    directory = directory or history_cache_dir
+    if not directory:
+        return False
+    path = os.path.join(directory, user_key(school, user))
+    found = os.path.isdir(path)
+    shutil.rmtree(path, ignore_errors=True)
+    return found
+
+
+def purge_expired(directory: str or None = None, max_age: float = cache_max_age) -> int:
+    """Removes stored years older than max_age seconds, stale checkpoints and users left with nothing stored
+
+    Returns:
+        Number of years removed
+    """
+    directory = directory or history_cache_dir
+    if not directory or not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for key in os.listdir(directory):
+        terms = os.path.join(directory, key, 'terms')
+        if os.path.isdir(terms):
+            for name in os.listdir(terms):
+                if _expired(os.path.join(terms, name), max_age):
+                    os.remove(os.path.join(terms, name))
+                    removed += 1
+        checkpoint = os.path.join(directory, key, 'checkpoint')
+        started = read_json(os.path.join(checkpoint, 'started.json'))
+        if os.path.isdir(checkpoint) and (started is None or time.time() - started['time'] > checkpoint_max_age):
+            shutil.rmtree(checkpoint, ignore_errors=True)
+        for path in (terms, os.path.join(directory, key)):
+            try:
+                # Only removed once empty
+                os.rmdir(path)
+            except OSError:
+                pass
+    return removed
+
+
+class TermCache:
+    """Finished school years of one user's history, one file per year
+
+    A year is only stored for max_age seconds, after which it counts as
+    not stored and is removed.
+    """
+
+    def __init__(self, directory: str, school: str, user: str, max_age: float = cache_max_age) -> None:
+        self.path = os.path.join(directory, user_key(school, user), 'terms')
+        self.max_age = max_age
+
+    @classmethod
+    def for_user(cls, school: str, user: str) -> 'TermCache' or None:
+        """Returns the user's cache, or None if caching is not configured"""
+        if not history_cache_dir:
+            return None
+        return cls(history_cache_dir, school, user)
+
+    def _file(self, year: str) -> str:
+        return os.path.join(self.path, year + '.json')
+
+    def get(self, year: str) -> dict or None:
+        """Returns the stored semesters of a year, or None if not stored or expired"""
+        if _expired(self._file(year), self.max_age):
+            try:
+                os.remove(self._file(year))
+            except FileNotFoundError:
+                # Already removed by another sync or the expire command
+                pass
+            return None
+        return read_json(self._file(year))
+
+    def put(self, year: str, year_data: dict, default=None) -> None:
+        """Stores a finished year
+
+        Args:
+            year: school year like "22-23"
+            year_data: semesters of the year mapped to their classes
+            default: passed to json.dump for objects that are not plain JSON
+        """
+        if is_finished_year(year):
+            write_json(self._file(year), year_data, default)
+
+
+class HistoryCheckpoint:
+    """Progress of one user's history import that is still running
+
+    Every completed year, and every completed class of a year that is
+    still being scraped, is saved as it finishes. If the import crashes
+    or runs out of time, the next one resumes from here. The checkpoint
+    is cleared once an import returns its result, and is not resumed
+    once it is older than max_age seconds.
+    """
+
+    def __init__(self, directory: str, school: str, user: str, max_age: float = checkpoint_max_age) -> None:
+        self.path = os.path.join(directory, user_key(school, user), 'checkpoint')
+        started = read_json(self._started_file())
+        if os.path.isdir(self.path) and (started is None or time.time() - started['time'] > max_age):
+            self.clear()
+
+    @classmethod
+    def for_user(cls, school: str, user: str) -> 'HistoryCheckpoint' or None:
+        """Returns the user's checkpoint, or None if caching is not configured"""
+        if not history_cache_dir:
+            return None
+        return cls(history_cache_dir, school, user)
+
+    def _started_file(self) -> str:
+        return os.path.join(self.path, 'started.json')
+
+    def _start(self) -> None:
+        """Records when the checkpoint was started, before anything is saved to it"""
+        if not os.path.exists(self._started_file()):
+            write_json(self._started_file(), {'time': time.time()})
+
+    def _year_file(self, year: str) -> str:
+        return os.path.join(self.path, 'years', year + '.json')
+
+    def _class_file(self, year: str, class_url: str) -> str:
+        name = hashlib.sha256(class_url.encode()).hexdigest()[:32]
+        return os.path.join(self.path, 'classes', year, name + '.json')
+
+    def get_year(self, year: str) -> dict or None:
+        return read_json(self._year_file(year))
+
+    def put_year(self, year: str, year_data: dict, default=None) -> None:
+        """Saves a completed year and drops the checkpoints of its classes"""
+        self._start()
+        write_json(self._year_file(year), year_data, default)
+        shutil.rmtree(os.path.join(self.path, 'classes', year), ignore_errors=True)
+
+    def get_class(self, year: str, class_url: str) -> dict or None:
+        return read_json(self._class_file(year, class_url))
+
+    def put_class(self, year: str, class_url: str, class_data, default=None) -> None:
+        self._start()
+        write_json(self._class_file(year, class_url), class_data, default)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["expire"]:
+        print(f"Removed {purge_expired()} expired years")
+    elif sys.argv[1:2] == ["purge"] and len(sys.argv) == 4:
+        print("Removed" if purge_user(sys.argv[2], sys.argv[3]) else "Nothing stored")
+    else:
+        sys.exit("Usage: python history_cache.py expire | purge <school> <school username>")
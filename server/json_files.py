@@ -0,0 +1,21 @@
+"""Reading and writing the JSON files kept on disk, like the history cache and catalog snapshots"""
+import json
+import os
+
+
+def write_json(path: str, data, default=None) -> None:
+    """Writes JSON so a crash never leaves a half-written file behind"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf8') as f:
+        json.dump(data, f, default=default)
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str):
+    """Returns the JSON in a file, or None if it is missing or was cut off"""
+    try:
+        with open(path, encoding='utf8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
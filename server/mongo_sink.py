@@ -0,0 +1,313 @@
+"""Writes scrape results straight to MongoDB
+
+For batch refreshes and history imports, the scraper can store its
+result itself instead of sending it to Node as one large JSON line. The
+grades are written to the user's document in users_<shard> the same way
+the processors in dbClient.js store a result:
+
+    present sync: $set grades.<term>.<semester>, or grades.<term> and
+        weights.<term> for Basis
+    history import: $set every new term and semester; stored semesters
+        keep the assignments and teacher of classes that came back empty
+    partial results: classes the result left out keep their stored copies
+
+The same update applies what Node does once the grades are stored:
+weights, addedWeights, addedAssignments and editedAssignments get an
+entry for every class of the written terms like the init* helpers in
+dbClient.js, edits of removed assignments are dropped, and the change
+data goes to alerts.lastUpdated. The class statistics kept by
+updateClassesForUser live in the shared classes collection, so the
+written semesters are added to pendingClassUpdates instead and Node
+brings them up to date the next time the user loads their grades.
+
+Only a summary of the write is then sent over stdout.
+
+DB_URL and DB_NAME ("stable" by default) select the database.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+from pymongo import MongoClient
+
+users_collection_name = "users"
+# SyncStatus.COMPLETE in enums.js
+sync_complete = "complete"
+# Per class data Node keeps next to the grades of each semester
+class_data_fields = ('weights', 'addedWeights', 'addedAssignments', 'editedAssignments')
+
+
+def shard(username: str) -> int:
+    """Returns the users collection shard of a username, same as hash() in dbClient.js"""
+    value = 5381
+    # JavaScript strings are UTF-16 and its << works on signed 32 bit integers
+    data = username.encode('utf-16-le')
+    for i in range(0, len(data), 2):
+        shifted = (value << 5) & 0xFFFFFFFF
+        if shifted >= 0x80000000:
+            shifted -= 0x100000000
+        value = shifted + value + int.from_bytes(data[i:i + 2], 'little')
+    return abs(value) % 10
+
+
+def database_from_env():
+    return MongoClient(os.getenv("DB_URL"))[os.getenv("DB_NAME", "stable")]
+
+
+def keep_missing_classes(old_classes: list or None, new_classes: list, key: str = 'class_name') -> list:
+    """Adds the stored classes a partial result left out, same as _keepMissingClasses in dbClient.js"""
+    new_names = {local_class[key] for local_class in new_classes}
+    return new_classes + [local_class for local_class in old_classes or () if local_class[key] not in new_names]
+
+
+def keep_history_grades(old_classes: list, new_classes: list) -> None:
+    """Gives classes that came back without assignments their stored ones, same as _updateGradeHistory"""
+    for new_class in new_classes:
+        old_class = next((c for c in old_classes if c['class_name'] == new_class['class_name']), None)
+        if old_class is None:
+            continue
+        if not new_class['grades']:
+            new_class['grades'] = old_class['grades']
+        if old_class.get('teacher_name') and not new_class.get('teacher_name'):
+            new_class['teacher_name'] = old_class['teacher_name']
+
+
+def _find_class(entries: list, class_name: str) -> int:
+    return next((i for i, entry in enumerate(entries) if entry.get('className') == class_name), -1)
+
+
+def init_class_data(field: str, current: list or None, classes: list) -> list:
+    """Returns a semester's entries of one of class_data_fields after new grades, same as its init* helper
+
+    Like in dbClient.js, the entries are updated in place of the stored list, so the stored entries an
+    earlier class took over are seen by the later ones.
+    """
+    temp = current if current is not None else []
+    current = current or []
+    for k, local_class in enumerate(classes):
+        class_name = local_class['class_name']
+        if k >= len(temp):
+            temp.append({})
+        existing = _find_class(current, class_name)
+        if field == 'weights':
+            if existing == -1:
+                temp[k] = {'className': class_name, 'weights': {}, 'hasWeights': False}
+            else:
+                class_weights = dict(current[existing].get('weights') or {})
+                has_weights = current[existing].get('hasWeights')
+                temp[k]['className'] = class_name
+                temp[k]['weights'] = class_weights
+                temp[k]['hasWeights'] = has_weights
+            # Make sure weights match grades
+            categories = dict.fromkeys(grade.get('category') for grade in local_class['grades'])
+            temp[k]['weights'] = {category: weight for category, weight in temp[k]['weights'].items()
+                                  if category in categories}
+            for category in categories:
+                temp[k]['weights'].setdefault(category, None)
+        elif existing == -1:
+            temp[k] = {'className': class_name, **{'addedWeights': {'weights': {}}, 'addedAssignments': {'data': []},
+                                                   'editedAssignments': {'data': {}}}[field]}
+        else:
+            temp[k] = current[existing]
+            if field == 'addedAssignments' and not isinstance(temp[k].get('data'), list):
+                temp[k]['data'] = []
+            elif field == 'editedAssignments' and not isinstance(temp[k].get('data'), dict):
+                temp[k]['data'] = {}
+            if field != 'addedWeights':
+                temp[k].pop('assignments', None)
+    if field == 'weights':
+        # Make sure it's the right length
+        del temp[len(classes):]
+    return temp
+
+
+def _without(local_class: dict or None, fields: tuple) -> dict:
+    return {key: value for key, value in (local_class or {}).items() if key not in fields}
+
+
+def _differs(old_value, new_value) -> bool:
+    # Node compares with !==, so objects and arrays always count as changed
+    return new_value != old_value or isinstance(old_value, (dict, list))
+
+
+def change_data(old_classes: list or None, new_classes: list) -> tuple:
+    """Returns the change data and locked state of a present sync, same as _updateGrades in dbClient.js"""
+    new_names = [local_class['class_name'] for local_class in new_classes]
+    new_psaids = [[grade.get('psaid') for grade in local_class['grades']] for local_class in new_classes]
+    added = {name: psaids for name, psaids in zip(new_names, new_psaids) if psaids}
+    modified = {}
+    removed = {}
+    overall = {}
+    if old_classes is not None:
+        old_classes = [local_class for local_class in old_classes if local_class['class_name'] in new_names]
+        old_names = [local_class['class_name'] for local_class in old_classes]
+        added = {}
+        for name, psaids in zip(new_names, new_psaids):
+            if name in old_names:
+                old_psaids = [grade.get('psaid') for grade in old_classes[old_names.index(name)]['grades']]
+                psaids = [psaid for psaid in psaids if psaid not in old_psaids]
+                if psaids:
+                    added[name] = psaids
+        for old_class in old_classes:
+            name = old_class['class_name']
+            new_class = new_classes[new_names.index(name)]
+            psaids = new_psaids[new_names.index(name)]
+            changed = [grade for grade in old_class['grades'] if grade.get('psaid') in psaids and grade != next(
+                new_grade for new_grade in new_class['grades'] if new_grade.get('psaid') == grade.get('psaid'))]
+            if changed:
+                modified[name] = changed
+            gone = [grade for grade in old_class['grades'] if grade.get('psaid') not in psaids]
+            if gone:
+                removed[name] = gone
+            old_fields = _without(old_class, ('grades', 'class_name'))
+            new_fields = _without(new_class, ('grades', 'class_name'))
+            old_fields['ps_locked'] = new_fields.get('ps_locked')
+            overall[name] = {key: value for key, value in old_fields.items()
+                             if key == 'ps_locked' or _differs(value, new_fields.get(key))}
+
+    ps_locked = any(local_class.get('ps_locked') is True for local_class in new_classes)
+    if ps_locked:
+        # It's not possible to get this data when PowerSchool is locked
+        overall = {}
+    else:
+        for name in list(overall):
+            overall[name].pop('ps_locked', None)
+            if not overall[name]:
+                del overall[name]
+    return {'added': added, 'modified': modified, 'removed': removed, 'overall': overall}, ps_locked
+
+
+def history_overall(old_classes: list, new_classes: list) -> dict:
+    """Returns the overall changes of a stored semester in a history import, same as _updateGradeHistory"""
+    overall = {}
+    for old_class in old_classes:
+        new_class = next((c for c in new_classes if c['class_name'] == old_class['class_name']), None)
+        old_fields = _without(old_class, ('grades', 'class_name', 'ps_locked', 'student_id', 'section_id',
+                                          'teacher_name'))
+        new_fields = _without(new_class, ('grades', 'class_name', 'ps_locked', 'teacher_name'))
+        changed = {key: value for key, value in old_fields.items() if _differs(value, new_fields.get(key))}
+        if changed:
+            overall[old_class['class_name']] = changed
+    return overall
+
+
+class MongoSink:
+    def __init__(self, database, username: str) -> None:
+        """
+        Args:
+            database: pymongo database to write to
+            username: Graderoom username the grades belong to
+        """
+        # Node stores and shards usernames in lowercase
+        self.username = username.lower()
+        self.users = database[f"{users_collection_name}_{shard(self.username)}"]
+
+    @classmethod
+    def from_env(cls, username: str) -> 'MongoSink':
+        return cls(database_from_env(), username)
+
+    def write(self, grades: dict, weights: dict or None = None, as_dict=None, partial: bool = False,
+              history: bool = False) -> dict:
+        """Stores a scrape result in the user's document
+
+        Args:
+            grades: terms mapped to semesters mapped to classes
+            weights: terms mapped to semesters mapped to class weights, only sent by Basis
+            as_dict: turns class records into dictionaries
+            partial: the result left out classes that failed or ran out of time
+            history: the result is a history import rather than a present sync
+
+        Returns:
+            Counts of the classes and assignments written and whether the document changed
+
+        Raises:
+            LookupError: if there is no user with the username
+        """
+        # Stored exactly as Node would store the JSON line
+        grades = json.loads(json.dumps(grades, default=as_dict))
+        weights = json.loads(json.dumps(weights, default=as_dict)) if weights is not None else None
+        terms = list(grades) if history else list(grades)[:1]
+        projection = {f"{field}.{term}": 1 for term in terms for field in ('grades',) + class_data_fields}
+        user = self.users.find_one({'username': self.username}, projection or {'username': 1})
+        if user is None:
+            raise LookupError(f"No user found with username {self.username}")
+        stored_grades = user.get('grades', {})
+        stored_weights = user.get('weights', {})
+        # The user's grades of the written terms once the result is stored
+        term_grades = {term: dict(stored_grades.get(term, {})) for term in terms}
+        term_weights = {}
+
+        updates = {}
+        time = int(datetime.now(timezone.utc).timestamp() * 1000)
+        changes = {}
+        ps_locked = False
+        if history:
+            for term, semesters in grades.items():
+                if term not in stored_grades:
+                    updates[f"grades.{term}"] = term_grades[term] = semesters
+                    continue
+                for semester, classes in semesters.items():
+                    old_classes = stored_grades[term].get(semester)
+                    if old_classes is not None:
+                        if not classes:
+                            continue
+                        keep_history_grades(old_classes, classes)
+                        if partial:
+                            classes = keep_missing_classes(old_classes, classes)
+                        changes = {'added': {}, 'modified': {}, 'removed': {},
+                                   'overall': history_overall(old_classes, classes)}
+                    updates[f"grades.{term}.{semester}"] = term_grades[term][semester] = classes
+        elif terms:
+            # Like Node, a present sync only stores the first term of the result
+            term = terms[0]
+            old_semesters = stored_grades.get(term, {})
+            semester = list(grades[term])[-1]
+            if partial:
+                grades[term][semester] = keep_missing_classes(old_semesters.get(semester), grades[term][semester])
+            changes, ps_locked = change_data(old_semesters.get(semester), grades[term][semester])
+            edited = (user.get('editedAssignments', {}).get(term) or {}).get(semester) or []
+            for class_name, assignments in changes['removed'].items():
+                # Make sure any removed items don't get to have edits
+                class_index = _find_class(edited, class_name)
+                for assignment in assignments if class_index != -1 else ():
+                    edited[class_index]['data'].pop(str(assignment.get('psaid')), None)
+            if weights is not None:
+                semesters = grades[term]
+                term_weights[term] = weights[term]
+                if partial:
+                    old_weights = stored_weights.get(term, {})
+                    for other in {**old_semesters, **semesters}:
+                        semesters[other] = keep_missing_classes(old_semesters.get(other), semesters.get(other, []))
+                        term_weights[term][other] = keep_missing_classes(old_weights.get(other),
+                                                                         term_weights[term].get(other, []),
+                                                                         'className')
+                updates[f"grades.{term}"] = semesters
+                term_grades[term] = dict(semesters)
+            else:
+                updates[f"grades.{term}.{semester}"] = term_grades[term][semester] = grades[term][semester]
+
+        summary = {'classes': 0, 'assignments': 0, 'modified': 0}
+        if not updates:
+            return summary
+        pending = []
+        for term in terms:
+            for semester, classes in term_grades[term].items():
+                if f"grades.{term}" in updates or f"grades.{term}.{semester}" in updates:
+                    summary['classes'] += len(classes)
+                    summary['assignments'] += sum(len(local_class['grades']) for local_class in classes)
+                    pending.append({'term': term, 'semester': semester})
+            for field in class_data_fields:
+                current = term_weights[term] if field == 'weights' and term in term_weights else \
+                    user.get(field, {}).get(term) or {}
+                updates[f"{field}.{term}"] = {semester: init_class_data(field, current.get(semester), classes)
+                                              for semester, classes in term_grades[term].items()}
+
+        pushes = {'alerts.lastUpdated': {'timestamp': time, 'changeData': changes, 'ps_locked': ps_locked}}
+        if history:
+            pushes['updatedGradeHistory'] = time
+        else:
+            updates['updatedInBackground'] = sync_complete
+        result = self.users.update_one({'username': self.username}, {
+            '$set': updates, '$push': pushes, '$addToSet': {'pendingClassUpdates': {'$each': pending}}})
+        summary['modified'] = result.modified_count
+        return summary
@@ -23,6 +23,7 @@ module.exports = function (app, passport) {
                 return;
             }
 
+            await dbClient.finishStoredSyncs(req.user.username);
             let {term, semester} = (await dbClient.getMostRecentTermData(req.user.username)).data.value;
             if (req.query.term && req.query.semester) {
                 if ((term === req.query.term && semester === req.query.semester) || !(await dbClient.userHasSemester(req.user.username, req.query.term, req.query.semester)).data.value) {
@@ -0,0 +1,68 @@
+"""Request scheduling by priority lane for long-lived scraper workers
+
+Every request a scraper sends takes one slot from a shared pool for
+as long as the request is in flight. Slots are handed out by lane:
+
+    interactive: a user waiting on a sync, e.g. get_present
+    history: get_history imports
+    background: bulk refreshes, e.g. locked mode get_locked
+
+A freed slot always goes to the highest priority lane with a waiting
+request, so an interactive sync overtakes background work at the next
+request rather than waiting for whole syncs to finish. Each lane is
+also capped so lower lanes can never fill every slot.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+lanes = ('interactive', 'history', 'background')
+
+
+class PriorityScheduler:
+    def __init__(self, capacity: int = 8, caps: dict or None = None) -> None:
+        """
+        Args:
+            capacity: requests allowed in flight across all lanes
+            caps: requests allowed in flight per lane. By default history
+                may use half of the slots and background a quarter.
+        """
+        self.capacity = capacity
+        self.caps = {'interactive': capacity, 'history': max(1, capacity // 2), 'background': max(1, capacity // 4)}
+        self.caps.update(caps or {})
+        self._active = {lane: 0 for lane in lanes}
+        self._waiting = {lane: 0 for lane in lanes}
+        self._condition = threading.Condition()
+        # Requests run and total seconds spent waiting for a slot per lane
+        self.stats = {lane: {'requests': 0, 'wait': 0.0} for lane in lanes}
+
+    def _can_run(self, lane: str) -> bool:
+        if sum(self._active.values()) >= self.capacity or self._active[lane] >= self.caps[lane]:
+            return False
+        # Higher lanes that are waiting and under their cap go first
+        for higher in lanes[:lanes.index(lane)]:
+            if self._waiting[higher] and self._active[higher] < self.caps[higher]:
+                return False
+        return True
+
+    @contextmanager
+    def slot(self, lane: str):
+        """Holds a request slot of the given lane for the duration of the block"""
+        if lane not in self._active:
+            raise ValueError(f"Unknown lane {lane}")
+
+        start = time.perf_counter()
+        with self._condition:
+            self._waiting[lane] += 1
+            while not self._can_run(lane):
+                self._condition.wait()
+            self._waiting[lane] -= 1
+            self._active[lane] += 1
+            self.stats[lane]['requests'] += 1
+            self.stats[lane]['wait'] += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active[lane] -= 1
+                self._condition.notify_all()
@@ -1,34 +1,111 @@
 import json
+import os
 import sys
 import time
 import traceback
+from bisect import bisect_left
+from contextlib import nullcontext
 from datetime import datetime
+from types import SimpleNamespace
 
-import requests
-from bs4 import BeautifulSoup as bS
-from bs4 import Comment
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from catalog_lookup import CatalogLookup
+from history_cache import HistoryCheckpoint, TermCache, is_finished_year
 
 ndsj_url = "ps.ndsj.org"
 bcp_url = "powerschool.bcp.org"
 
+basis_terms_file = os.getenv("BASIS_TERMS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                               "basis_terms.json"))
+
 
-def json_format(success: bool, message_or_grades: str or dict, weights: dict or None = None) -> str:
+def json_format(success: bool, message_or_grades: str or dict, weights: dict or None = None,
+                partial: bool = False, **extra) -> str:
     """
     Args:
         weights: weight data in JSON format
         success: boolean if scraping was successful
         message_or_grades: a message for errors or grade data in JSON format
+        partial: the grades are missing classes that ran out of time or failed
+        extra: other fields of the response, e.g. a structured error
 
     Returns:
         A JSON formatted response
     """
 
-    if weights is not None and success:
-        return json.dumps({'success': True, 'new_grades': message_or_grades, 'new_weights': weights})
     if success:
-        return json.dumps({'success': True, 'new_grades': message_or_grades})
+        response = {'success': True, 'new_grades': message_or_grades}
+        if weights is not None:
+            response['new_weights'] = weights
+        if partial:
+            response['partial'] = True
+        response.update(extra)
+        return json.dumps(response, default=wire_format)
+
+    return json.dumps({'success': False, 'message': message_or_grades, **extra})
+
+
+def wire_format(obj) -> dict:
+    """Materializes scraper records into their JSON wire format
+
+    Passed as ``default`` to ``json.dumps`` so assignment and class
+    records are only turned into dictionaries while they are being
+    written out.
+    """
+    if hasattr(obj, 'as_dict'):
+        return obj.as_dict() if callable(obj.as_dict) else obj.as_dict
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def sink_format(summary: dict, partial: bool = False, **extra) -> str:
+    """Returns the response sent when the grades were written to a sink instead"""
+    response = {'success': True, 'stored': summary}
+    if partial:
+        response['partial'] = True
+    response.update(extra)
+    return json.dumps(response)
+
+
+def parse_html(text: str):
+    """Parses a page, bs4 is only imported once the first page is parsed"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, "html.parser")
+
+
+def base_url_adapter(base_url: str, **adapter_options):
+    """Returns a requests adapter that sends every request to one server instead
+
+    https://host/path is sent to <base_url>/host/path, e.g. to the load test
+    stand-in server. Responses keep the original url, so cookies and
+    redirects still belong to the original host.
+
+    Args:
+        base_url: server to send requests to, e.g. http://127.0.0.1:8000
+        adapter_options: passed on to HTTPAdapter
+    """
+    from requests.adapters import HTTPAdapter
+
+    class BaseUrlAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            rerouted = request.copy()
+            rerouted.url = base_url.rstrip("/") + "/" + request.url.split("://", 1)[1]
+            response = super().send(rerouted, **kwargs)
+            response.url = request.url
+            response.request = request
+            return response
+
+    return BaseUrlAdapter(**adapter_options)
 
-    return json.dumps({'success': False, 'message': message_or_grades})
+
+def is_timeout(e: Exception) -> bool:
+    # requests is only imported once a request is sent, so anything raised before then is not a timeout
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(e, requests.Timeout)
 
 
 def status(progress: float, message: str) -> str:
@@ -53,6 +130,58 @@ def clean_number(n: str) -> bool or float:
         return False
 
 
+def _intern(value):
+    # Names, comments and dates repeat across assignments and classes, so each distinct string is kept once
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PowerSchoolAssignment:
+    """A single PowerSchool assignment
+
+    Stored with __slots__ instead of a dictionary since a history sync
+    keeps thousands of these alive until the result is serialized. The
+    due date is only kept as sort_date and formatted when it is read, and
+    strings that repeat across assignments are interned.
+    """
+
+    __slots__ = ('sort_date', 'category', 'assignment_name', 'exclude', 'points_possible', 'points_gotten',
+                 'grade_percent', 'psaid', 'description', 'comment')
+
+    def __init__(self, sort_date: float, category: str, assignment_name: str, exclude: bool,
+                 points_possible: float or bool, points_gotten: float or bool, grade_percent: float or bool,
+                 psaid: int, description: str or bool, comment: str or bool) -> None:
+        self.sort_date = sort_date
+        self.category = sys.intern(category)
+        self.assignment_name = _intern(assignment_name)
+        self.exclude = exclude
+        self.points_possible = points_possible
+        self.points_gotten = points_gotten
+        self.grade_percent = grade_percent
+        self.psaid = psaid
+        self.description = _intern(description)
+        self.comment = _intern(comment)
+
+    @property
+    def date(self) -> str:
+        """The due date as MM/DD/YYYY"""
+        return datetime.fromtimestamp(self.sort_date).strftime("%m/%d/%Y")
+
+    def as_dict(self) -> dict:
+        """Returns the assignment in the wire format, without the sorting date"""
+        return {
+            "date": self.date,
+            "category": self.category,
+            "assignment_name": self.assignment_name,
+            "exclude": self.exclude,
+            "points_possible": self.points_possible,
+            "points_gotten": self.points_gotten,
+            "grade_percent": self.grade_percent,
+            "psaid": self.psaid,
+            "description": self.description,
+            "comment": self.comment
+        }
+
+
 class PowerSchoolClassGrade:
     """Contains information and assignments for a PowerSchool class
 
@@ -70,24 +199,29 @@ class PowerSchoolClassGrade:
         student_id: string
         section_id: string
         ps_locked: boolean
-        grades: list of dictionaries of individual assignments
+        grades: list of PowerSchoolAssignment records
+        catalog: catalog data of the class, only sent when it was looked up
     """
 
+    __slots__ = ('class_name', 'teacher_name', 'overall_percent', 'overall_letter', 'student_id', 'section_id',
+                 'ps_locked', 'grades', 'catalog')
+
     def __init__(self, class_name: str, teacher_name: str or bool, overall_percent: float, overall_letter: str,
                  student_id: str or bool, section_id: str or bool, ps_locked: bool) -> None:
         """Inits ClassGrade with PowerSchool class information"""
         self.class_name = class_name
-        self.teacher_name = teacher_name
+        self.teacher_name = _intern(teacher_name)
         self.overall_percent = overall_percent
         self.overall_letter = overall_letter
         self.student_id = student_id
         self.section_id = section_id
         self.ps_locked = ps_locked
         self.grades: list = []
+        self.catalog: dict or None = None
 
     def as_dict(self) -> dict:
         """Returns ClassGrade object as a formatted dictionary"""
-        return {
+        class_dict = {
             'class_name': self.class_name,
             'teacher_name': self.teacher_name,
             'overall_percent': self.overall_percent,
@@ -95,14 +229,17 @@ class PowerSchoolClassGrade:
             'student_id': self.student_id,
             'section_id': self.section_id,
             'ps_locked': self.ps_locked,
-            'grades': self.grades
+            'grades': [assignment.as_dict() for assignment in self.grades]
         }
+        if self.catalog is not None:
+            class_dict['catalog'] = self.catalog
+        return class_dict
 
 
-def parse_ps_class(local_class: PowerSchoolClassGrade, raw_data: requests.Response) -> dict:
+def parse_ps_class(local_class: PowerSchoolClassGrade, raw_data: 'requests.Response') -> PowerSchoolClassGrade:
     # Function that takes a Powerschool assignment object and returns
     # a Graderoom assignment object
-    def stripper(info: dict) -> dict or None:
+    def stripper(info: dict) -> PowerSchoolAssignment or None:
         if "_assignmentsections" not in info:
             return
 
@@ -157,22 +294,11 @@ def parse_ps_class(local_class: PowerSchoolClassGrade, raw_data: requests.Respon
             grade_percent = False
             comment = False
 
-        return {
-            "date": date,
-            "sort_date": sort_date,
-            "category": category,
-            "assignment_name": assignment_name,
-            "exclude": exclude,
-            "points_possible": points_possible,
-            "points_gotten": points_gotten,
-            "grade_percent": grade_percent,
-            "psaid": psaid,
-            "description": description,
-            "comment": comment
-        }
+        return PowerSchoolAssignment(sort_date, category, assignment_name, exclude, points_possible,
+                                     points_gotten, grade_percent, psaid, description, comment)
 
     # function that removes nonexistence objects
-    def remove_empty(value: dict or None) -> bool:
+    def remove_empty(value: PowerSchoolAssignment or None) -> bool:
         if value is None:
             return False
         return True
@@ -181,20 +307,282 @@ def parse_ps_class(local_class: PowerSchoolClassGrade, raw_data: requests.Respon
     raw = json.loads(raw_data.text)
 
     # output
-    local_class.grades = sorted(list(filter(remove_empty, map(stripper, raw))), key=lambda j: j['sort_date'])
-    local_class.grades = [{key: value for key, value in assignment.items() if key != 'sort_date'} for assignment in
-                          local_class.grades]  # Remove sorting date
+    # The sorting date stays on the record and is dropped when serialized
+    local_class.grades = sorted(filter(remove_empty, map(stripper, raw)), key=lambda j: j.sort_date)
+
+    return local_class
+
+
+def parse_home_classes(home_soup) -> list:
+    """Extracts the class rows of the PowerSchool home page
+
+    Returns:
+        An (assignments link or None, overall percent, overall letter) tuple for each class row
+    """
+    # Main table on PowerSchool Home Page
+    main_table = home_soup.find("table", class_='linkDescList grid')
+
+    home_classes = []
+    # Only the rows of a class in the table
+    for class_row in main_table.find_all("tr"):
+        if not (class_row.has_attr('class') and class_row['class'] == ['center']):
+            continue
+
+        assignments_link = None
+        overall_percent = None
+        overall_letter = None
+
+        # Get overall grade and the link to assignments page
+        links = class_row.find_all("a")
+        for link in links:
+            # If an overall grade is present, the link text is bold
+            # If no grade is present, then it is [ i ]
+            # Finally, check if it is actually a class grade link
+            # by checking the first five letters for "score"
+            if ((link.has_attr('class') and link['class'] == ['bold']) or link.text == '[ i ]') \
+                    and link['href'][:5] == 'score':
+
+                # make sure it's not a quarter
+                semester = str(link['href']).split('&fg=')[1][:2]
+                if semester.startswith("Q"):
+                    continue
+
+                assignments_link = link['href']
+
+                # Split combined letter grade and percent text
+                # into two separate values
+                letter_and_percent = link.text
+                if letter_and_percent == '[ i ]':
+                    overall_letter = False
+                    overall_percent = False
+                else:
+                    for i, charac in enumerate(letter_and_percent):
+                        if str.isdigit(charac):
+                            overall_letter = letter_and_percent[:i]
+                            overall_percent = float(letter_and_percent[i:])
+                            break
+
+        home_classes.append((assignments_link, overall_percent, overall_letter))
+    return home_classes
+
+
+def parse_class_header(grades_soup) -> tuple:
+    """Returns the class and teacher name of a PowerSchool class assignments page"""
+    # The two tables in the page. info is top, grades is bottom
+    class_tables = grades_soup.find_all('table')
+    info_table = class_tables[0]
+
+    # Get teacher and class name
+    info_row = info_table.find_all('tr')[1]
+    info_data = info_row.find_all('td')
+    return info_data[0].text, info_data[1].text
+
+
+def parse_class_ids(grades_soup) -> tuple:
+    """Returns the section and student id of a PowerSchool class assignments page"""
+    # Get the Section ID for a class
+    wrapper = grades_soup.find('div', class_='xteContentWrapper')
+    section_id = wrapper.find('div')['data-sectionid']
+
+    # Get the Student ID for a class
+    student_id = wrapper['data-ng-init'].split(';')[0].split("'")[1][3:]
+    return section_id, student_id
+
+
+def parse_term_rows(term_soup) -> list:
+    """Extracts the semesters and classes of one year of PowerSchool grade history
+
+    Returns:
+        In page order, ("semester", name) for each semester header, and
+        ("class", class name, overall letter, overall percent, assignments link or None)
+        for each class row under a semester
+    """
+    main_table = term_soup.find("table")
+
+    rows = []
+    in_semester = False
+    for row in main_table.find_all("tr"):
+        # Identify what semester we are under
+        th = row.find("th")
+        if th is not None and th.text in ["S0", "S1", "S2"]:
+            rows.append(("semester", th.text))
+            in_semester = True
+
+        # Check if the current row has class data
+        if in_semester and row.find("td", class_="table-element-text-align-start"):
+            data = row.find_all("td")
+            link = row.find("a")
+            rows.append(("class", clean_string(data[0].text), clean_string(data[1].text), clean_number(data[2].text),
+                         link.get('href') if link else None))
+    return rows
+
+
+def extract_class_page(text: str) -> tuple:
+    """Parses a class assignments page, small enough to run in a parse pool worker
+
+    Returns:
+        (class name, teacher name, section id, student id), the ids are None
+        when the class or teacher name is missing
+    """
+    grades_soup = parse_html(text)
+    class_name, teacher_name = parse_class_header(grades_soup)
+    if not (class_name and teacher_name):
+        return class_name, teacher_name, None, None
+    return (class_name, teacher_name) + parse_class_ids(grades_soup)
+
+
+def extract_ps_class(local_class: PowerSchoolClassGrade, text: str) -> PowerSchoolClassGrade:
+    """parse_ps_class for the text of an assignment lookup, so only text is sent to a parse pool worker"""
+    return parse_ps_class(local_class, SimpleNamespace(text=text))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a sync runs out of its time budget"""
+
+
+class Deadline:
+    """A point in time a sync or one phase of it has to finish by"""
+
+    def __init__(self, seconds: float) -> None:
+        self.end = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.end - time.monotonic()
 
-    return local_class.as_dict()
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def phase(self, share: float) -> 'Deadline':
+        """Returns a deadline for the next phase that gets a share of the remaining time"""
+        return Deadline(max(0.0, self.remaining()) * min(share, 1))
+
+
+def current_rss_mb() -> float:
+    """Returns the resident set size of this process, or its peak where the current size is unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Returns the largest resident set size this process has had"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class MemoryLimitExceeded(Exception):
+    """Raised when the scraper's process grows past its memory ceiling"""
+
+    def __init__(self, phase: str, rss_mb: float, limit_mb: float, peaks: dict) -> None:
+        super().__init__("Sync ran out of memory.")
+        self.phase = phase
+        self.rss_mb = rss_mb
+        self.limit_mb = limit_mb
+        self.peaks = peaks
+
+    def as_dict(self) -> dict:
+        return {'type': 'memory_limit', 'phase': self.phase, 'rss_mb': round(self.rss_mb, 1),
+                'limit_mb': self.limit_mb, 'peak_rss_mb': self.peaks}
+
+
+class MemoryGuard:
+    """Tracks the peak memory use of each phase of a sync and enforces a ceiling"""
+
+    def __init__(self, limit_mb: float or None = None) -> None:
+        self.limit_mb = limit_mb
+        self.phase = 'start'
+        # Largest resident set size seen during each phase in MiB
+        self.peaks = {}
+
+    def check(self) -> None:
+        """
+        Raises:
+            MemoryLimitExceeded: if the process is using more memory than allowed
+        """
+        rss = current_rss_mb()
+        self.peaks[self.phase] = round(max(self.peaks.get(self.phase, 0), rss), 1)
+        if self.limit_mb is not None and rss > self.limit_mb:
+            raise MemoryLimitExceeded(self.phase, rss, self.limit_mb, dict(self.peaks))
+
+    def report(self) -> dict:
+        return {'peak_rss_mb': dict(self.peaks), 'process_peak_rss_mb': round(peak_rss_mb(), 1)}
 
 
 class Scraper:
-    def __init__(self):
-        """Inits with a session"""
-        self.session = requests.Session()
+    # Longest a single request may take
+    request_timeout = 10
+
+    def __init__(self, emit=print, session: 'requests.Session' or None = None, memoize: bool = True,
+                 scheduler=None, lane: str = 'interactive', deadline: Deadline or None = None, sink=None,
+                 low_memory: bool = False, memory_limit: float or None = None, parse_pool=None,
+                 series: dict or None = None, series_weights: dict or None = None, partial_results: bool = False,
+                 locked_lane: str or None = None):
+        """Inits with a session
+
+        Args:
+            emit: called with each progress and result line, prints them by default
+            session: session to scrape with, a new one is created if not given
+            memoize: reuse responses of pages already fetched during this sync
+            scheduler: PriorityScheduler every request takes a slot from, if any
+            lane: scheduler lane the requests of this sync belong to
+            deadline: time the whole sync has to finish by, unlimited if not given
+            sink: MongoSink the grades are written to instead of being emitted, if any
+            low_memory: throw away each parsed page as soon as its data is extracted and never keep parsed
+                pages for reuse. Peak memory use of each phase is sent with the result.
+            memory_limit: MiB the process may use before the sync is stopped, unlimited if not given
+            parse_pool: concurrent.futures executor pages are parsed in while the next ones download, if any.
+                Only used where a scraper pipelines its requests.
+            series: running-grade series sent with the account's last result, continued where classes only
+                gained assignments. Series are only sent with the result when given, {} when there are none yet.
+            series_weights: the user's stored weights and addedWeights the series are charted with, as
+                {"weights": {...}, "addedWeights": {...}}. PowerSchool classes without stored weights are
+                left to the page.
+            partial_results: when classes fail or the deadline passes, return the classes that were scraped
+                marked partial. Otherwise the whole sync fails, so a caller that replaces its stored classes
+                with the result never loses the ones left out.
+            locked_lane: scheduler lane the requests move to once login shows the account is locked, if any
+        """
+        self.emit = emit
+        self._session = session
+        self.memoize = memoize
+        self.scheduler = scheduler
+        self.lane = lane
+        self.deadline = deadline
+        self._budget = deadline
+        self.sink = sink
+        self.low_memory = low_memory
+        self.memory = MemoryGuard(memory_limit) if low_memory or memory_limit is not None else None
+        self.parse_pool = parse_pool
+        self.series = series
+        self.series_weights = series_weights
+        self.partial_results = partial_results
+        self.locked_lane = locked_lane
+        # Set when some classes were left out because they failed or ran out of time
+        self.partial = False
+        self.failure = None
+        self._responses = {}
+        self._soups = {}
+        # Requests sent, including retries, and requests answered from memory
+        self.stats = {'requests': 0, 'saved_requests': 0}
         self._progress = 0
         self._message = ""
-        print(status(self._progress, self._message))
+        self.emit(status(self._progress, self._message))
+
+    @property
+    def session(self) -> 'requests.Session':
+        """The session to scrape with, requests is only imported once the first request is sent"""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+            # Only set when testing against a stand-in server
+            if os.getenv("SCRAPE_BASE_URL"):
+                self._session.mount("https://", base_url_adapter(os.getenv("SCRAPE_BASE_URL")))
+        return self._session
 
     @property
     def progress(self):
@@ -207,20 +595,137 @@ class Scraper:
     @progress.setter
     def progress(self, value: float):
         self._progress = value
-        print(status(self._progress, self._message))
+        self.emit(status(self._progress, self._message))
 
     @message.setter
     def message(self, value: str):
         self._message = value
-        print(status(self._progress, self._message))
+        self.emit(status(self._progress, self._message))
+
+    def emit_result(self, grades: dict, weights: dict or None = None, history: bool = False) -> None:
+        """Emits the grades, or writes them to the sink and emits a summary
+
+        Args:
+            grades: terms mapped to semesters mapped to classes
+            weights: class weights of a Basis result
+            history: the grades are a history import, which the sink merges into the stored terms
+
+        Raises:
+            DeadlineExceeded: if classes were left out and the caller did not ask for partial results
+        """
+        if self.partial and not self.partial_results:
+            raise DeadlineExceeded("Sync ran out of time.")
+        extra = {'memory': self.memory.report()} if self.low_memory else {}
+        if self.series is not None:
+            from grade_series import series_for_grades
+            extra['series'] = series_for_grades(grades, weights, self.series, self.series_weights)
+        if self.sink is None:
+            self.emit(json_format(True, grades, weights, self.partial, **extra))
+        else:
+            summary = self.sink.write(grades, weights, wire_format, partial=self.partial, history=history)
+            self.emit(sink_format(summary, self.partial, **extra))
+
+    def start_phase(self, share: float, name: str or None = None) -> None:
+        """Gives the next phase of the sync a share of the time left before the deadline
+
+        Args:
+            share: part of the remaining time the phase gets
+            name: phase that memory use is tracked under
+        """
+        if self.deadline is not None:
+            self._budget = self.deadline.phase(share)
+        if name is not None and self.memory is not None:
+            self.memory.phase = name
+            self.check_memory()
+
+    def check_memory(self) -> None:
+        """Records memory use for the current phase
+
+        Raises:
+            MemoryLimitExceeded: if the process grew past its memory limit
+        """
+        if self.memory is not None:
+            self.memory.check()
+
+    def discard(self, soup) -> None:
+        """Frees a parsed page whose data has been extracted, in low memory mode"""
+        if self.low_memory and soup is not None:
+            soup.decompose()
+
+    def out_of_time(self) -> bool:
+        return self._budget is not None and self._budget.expired()
+
+    def _timeout(self, wait: float = 0) -> float:
+        """Returns the timeout for the next request, following the remaining phase budget
+
+        Raises:
+            DeadlineExceeded: if the request cannot start and finish after waiting before the deadline
+        """
+        if self._budget is None:
+            return self.request_timeout
+        remaining = self._budget.remaining() - wait
+        if remaining <= 0:
+            raise DeadlineExceeded("Sync ran out of time.")
+        return min(self.request_timeout, remaining)
+
+    def attempt(self, func, *args):
+        """Runs one class of a sync. With partial results, the sync is marked partial instead of failing if it raises.
+
+        Returns:
+            What func returned, or None if it raised
+        """
+        try:
+            return func(*args)
+        except MemoryLimitExceeded:
+            raise
+        except Exception as e:
+            if not self.partial_results:
+                raise
+            self.partial = True
+            self.failure = e
+            return None
+
+    def _request_slot(self):
+        """Waits for the scheduler to allow another request, if there is one"""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(self.lane)
+
+    @staticmethod
+    def _memo_key(url: str, headers: dict or None) -> tuple:
+        return url, tuple(sorted(headers.items())) if headers else ()
+
+    def invalidate(self, url: str or None = None) -> None:
+        """Forgets memoized pages
+
+        Args:
+            url: page to forget, every page is forgotten if not given
+        """
+        if url is None:
+            self._responses.clear()
+            self._soups.clear()
+            return
+        for memo in (self._responses, self._soups):
+            for key in [key for key in memo if key[0] == url]:
+                del memo[key]
+
+    def get_with_retries(self, url, headers=None, memo=True):
+        """Gets a page, reusing an earlier successful response for it when memo is set"""
+        key = self._memo_key(url, headers)
+        memo = memo and self.memoize
+        if memo and key in self._responses:
+            self.stats['saved_requests'] += 1
+            return self._responses[key]
 
-    def get_with_retries(self, url, headers=None):
         initial_wait_time = 2
         wait_time = initial_wait_time
         while True:
-            resp = self.session.get(url, headers=headers, timeout=10)
+            self.stats['requests'] += 1
+            with self._request_slot():
+                resp = self.session.get(url, headers=headers, timeout=self._timeout())
 
             if resp.status_code == 429:
+                self._timeout(wait_time)
                 self.message = (f"Graderoom is {'still ' if wait_time > initial_wait_time else ''}being rate-limited. "
                                 f"Waiting {wait_time:0d} seconds...")
                 time.sleep(wait_time)
@@ -229,16 +734,45 @@ class Scraper:
             else:
                 break
 
+        if memo and resp.status_code == 200:
+            self._responses[key] = resp
+        self.check_memory()
         return resp
 
-    def post_with_retries(self, url, headers=None, data=None, params=None, allow_redirects=True):
+    def get_soup(self, url, headers=None, memo=True):
+        """Gets and parses a page, reusing an earlier parse of it when memo is set
+
+        The soup is shared between callers, so it must not be modified.
+        In low memory mode soups are never shared, so callers may discard them.
+        """
+        key = self._memo_key(url, headers)
+        memo = memo and self.memoize
+        if memo and key in self._soups:
+            self.stats['saved_requests'] += 1
+            return self._soups[key]
+
+        resp = self.get_with_retries(url, headers, memo)
+        soup = parse_html(resp.text)
+        if memo and key in self._responses and not self.low_memory:
+            self._soups[key] = soup
+        self.check_memory()
+        return soup
+
+    def post_with_retries(self, url, headers=None, data=None, params=None, allow_redirects=True, invalidate=True):
+        """Posts to a page. Unless invalidate is False, memoized pages are forgotten first."""
+        if invalidate:
+            self.invalidate()
+
         initial_wait_time = 2
         wait_time = initial_wait_time
         while True:
-            resp = self.session.post(url, headers=headers, data=data, params=params, allow_redirects=allow_redirects,
-                                     timeout=10)
+            self.stats['requests'] += 1
+            with self._request_slot():
+                resp = self.session.post(url, headers=headers, data=data, params=params,
+                                         allow_redirects=allow_redirects, timeout=self._timeout())
 
             if resp.status_code == 429:
+                self._timeout(wait_time)
                 self.message = (f"Graderoom is {'still ' if wait_time > initial_wait_time else ''}being rate-limited. "
                                 f"Waiting {wait_time:0d} seconds...")
                 time.sleep(wait_time)
@@ -247,18 +781,35 @@ class Scraper:
             else:
                 break
 
+        self.check_memory()
         return resp
 
 
 class PowerschoolScraper(Scraper):
-    def __init__(self, _school: str) -> None:
-        super().__init__()
+    def __init__(self, _school: str, *args, catalog: CatalogLookup or None = None, **kwargs) -> None:
+        """
+        Args:
+            catalog: catalog lookup table to attach catalog data to each class from, if any
+        """
+        super().__init__(*args, **kwargs)
         self.school = _school
+        self.catalog = catalog
         if _school == "ndsj":
             self.base_url = ndsj_url
         elif _school == "bellarmine":
             self.base_url = bcp_url
 
+    def add_catalog_data(self, classes: list) -> None:
+        """Attaches catalog data to scraped classes that have none yet, matching every name in one batch"""
+        if self.catalog is None:
+            return
+        # Classes reused from the history cache are already plain dictionaries
+        classes = [local_class for local_class in classes
+                   if isinstance(local_class, PowerSchoolClassGrade) and local_class.catalog is None]
+        matches = self.catalog.match(self.school, [local_class.class_name for local_class in classes])
+        for local_class, catalog in zip(classes, matches):
+            local_class.catalog = catalog
+
     def __login_bcp(self, email: str, _password: str) -> None:
         """Logs into PowerSchool with credentials
 
@@ -319,12 +870,12 @@ class PowerschoolScraper(Scraper):
         self.message = "Logging in."
         url = "https://powerschool.bcp.org/student/idp?_userTypeHint=student"
         resp = self.get_with_retries(url, headers=headers_1)
-        soup = bS(resp.text, "html.parser")
+        soup = parse_html(resp.text)
 
         login_form = soup.find("form", id="loginForm")
         if login_form is None:
             self.progress = 0
-            print(json_format(False, 'Could not connect to PowerSchool.'))
+            self.emit(json_format(False, 'Could not connect to PowerSchool.'))
             sys.exit()
 
         dynamic_url = login_form.get("action")
@@ -339,7 +890,7 @@ class PowerschoolScraper(Scraper):
             'AuthMethod': 'FormsAuthentication'
         }
         resp = self.post_with_retries(dynamic_url, data=data, headers=headers_2)
-        soup = bS(resp.text, "html.parser")
+        soup = parse_html(resp.text)
         self.progress = 15
 
         # check error msg
@@ -347,7 +898,7 @@ class PowerschoolScraper(Scraper):
         error = soup.find("div", class_='grid-alert error')
         if error is not None and "Your account is disabled. Please contact your system administrator." in error.text:
             self.progress = 0
-            print(json_format(False, 'Your PowerSchool account is no longer active.'))
+            self.emit(json_format(False, 'Your PowerSchool account is no longer active.'))
             sys.exit()
 
         # If no response, authentication failed (incorrect login)
@@ -355,7 +906,7 @@ class PowerschoolScraper(Scraper):
         relay_state = soup.find("input", {'name': 'RelayState'})
         if samlr is None:
             self.progress = 0
-            print(json_format(False, "Incorrect login details."))
+            self.emit(json_format(False, "Incorrect login details."))
             sys.exit()
 
         # Fourth request
@@ -414,13 +965,14 @@ class PowerschoolScraper(Scraper):
             'request_locale': 'en_US',
         }
         resp = self.post_with_retries(url, data=data, headers=headers_1)
-        soup = bS(resp.text, 'html.parser')
 
-        error = soup.find("div", class_="feedback-alert")
-        if error is not None and error.text == "Invalid Username or Password!":
-            self.progress = 0
-            print(json_format(False, "Incorrect login details."))
-            sys.exit()
+        # Only parse the page when it could contain the error
+        if "Invalid Username or Password!" in resp.text:
+            error = parse_html(resp.text).find("div", class_="feedback-alert")
+            if error is not None and error.text == "Invalid Username or Password!":
+                self.progress = 0
+                self.emit(json_format(False, "Incorrect login details."))
+                sys.exit()
 
         self.progress = 20
 
@@ -430,7 +982,7 @@ class PowerschoolScraper(Scraper):
         """
         if self.school == "ndsj":
             self.__login_ndsj(email, _password)
-        elif school == "bellarmine":
+        elif self.school == "bellarmine":
             self.__login_bcp(email, _password)
         else:
             return False
@@ -438,16 +990,14 @@ class PowerschoolScraper(Scraper):
         # If we get to this point the session is logged in
         # Check if PowerSchool is locked
         url = 'https://' + self.base_url + '/guardian/home.html'
-        resp = self.get_with_retries(url)
-        soup_resp = bS(resp.text, "html.parser")
+        soup_resp = self.get_soup(url)
         table = soup_resp.find("table")
         self.progress = 25
 
         if table is not None:
             self.message = "Logged in!"
             url = 'https://' + self.base_url + '/guardian/termgrades.html'
-            resp = self.get_with_retries(url)
-            soup_resp = bS(resp.text, "html.parser")
+            soup_resp = self.get_soup(url)
 
             self.message = "Checking if PowerSchool is locked..."
             self.progress = 30
@@ -465,19 +1015,31 @@ class PowerschoolScraper(Scraper):
 
         else:
             self.progress = 0
-            print(json_format(False, 'Something went wrong.'))
+            self.emit(json_format(False, 'Something went wrong.'))
             sys.exit()
 
-    def get_history(self):
-        """Uses a session to grab all available grade data on powerschool"""
+    def get_history(self, stored_terms: set or None = None, cache: TermCache or None = None,
+                    checkpoint: HistoryCheckpoint or None = None):
+        """Uses a session to grab all available grade data on powerschool
+
+        Finished school years are never fetched again when possible.
+
+        Args:
+            stored_terms: years the caller already has stored. Finished ones are left out of the result.
+            cache: finished years are read from and saved to this cache
+            checkpoint: years and classes are saved here as they complete, so a
+                rerun after a crashed or timed out import resumes where it stopped
+        """
         url = 'https://' + self.base_url + '/guardian/termgrades.html'
-        resp = self.get_with_retries(url)
+        soup_resp = self.get_soup(url)
         self.progress = 35
         self.message = 'Searching for courses...'
-        soup_resp = bS(resp.text, "html.parser")
 
         # Begin organizing response data
         all_history = {}
+        skipped_stored_term = False
+        # Only a run cut short by the deadline is resumed from its checkpoint
+        timed_out = False
 
         # Locate links of past years
         year_list = soup_resp.find("ul", class_='tabs')
@@ -491,6 +1053,11 @@ class PowerschoolScraper(Scraper):
         self.progress = initial_progress + (max_progress - initial_progress) * scraped_term_count / (
             1 if total_term_count == 0 else total_term_count)
         for year_link in year_links:
+            if self.out_of_time():
+                self.partial = True
+                timed_out = True
+                break
+
             # Exclude summer school pages by checking for SS in title
             # since they show duplicate data
             link = year_link.find("a")
@@ -511,53 +1078,96 @@ class PowerschoolScraper(Scraper):
                 self.progress = initial_progress + (max_progress - initial_progress) * scraped_term_count / (
                     1 if total_term_count == 0 else total_term_count)
                 continue
+
+            # Finished years never change, so reuse what is already stored
+            finished = is_finished_year(year)
+            reused = False
+            if finished and stored_terms is not None and year in stored_terms:
+                # The caller keeps its stored copy, so the year is left out
+                skipped_stored_term = True
+                reused = True
+            else:
+                cached = cache.get(year) if finished and cache is not None else None
+                if cached is None and checkpoint is not None:
+                    cached = checkpoint.get_year(year)
+                if cached is not None:
+                    all_history[year] = cached
+                    reused = True
+            if reused:
+                scraped_term_count += 1
+                self.message = 'Synced ' + str(scraped_term_count) + ' of ' + str(total_term_count) + ' terms...'
+                self.progress = initial_progress + (max_progress - initial_progress) * scraped_term_count / (
+                    1 if total_term_count == 0 else total_term_count)
+                continue
+
             url = 'https://' + self.base_url + '/guardian/'
-            resp = self.get_with_retries(url + link['href'])
-            soup_resp = bS(resp.text, "html.parser")
+            soup_resp = self.get_soup(url + link['href'], memo=False)
 
             # Begin parsing data
-            main_table = soup_resp.find("table")
-            main_table_rows = main_table.find_all("tr")
+            term_rows = parse_term_rows(soup_resp)
+            self.discard(soup_resp)
 
             title = ""
             semester_classes = []
             year_data = {}
-            for row in main_table_rows:
+            # A year cut short by the deadline is left out, one with failed classes is not cached
+            interrupted = False
+            complete = True
+            for kind, *row in term_rows:
+                if self.out_of_time():
+                    interrupted = True
+                    break
+
                 # Identify what semester we are under
-                th = row.find("th")
-                if th is not None and th.text in ["S0", "S1", "S2"]:
+                if kind == "semester":
                     if semester_classes:
                         # Add data when all classes for a semester
                         # have been scraped
                         year_data["S3" if title == "S0" else title] = semester_classes
                     # Reset for a new semester
-                    title = th.text
+                    title = row[0]
                     semester_classes = []
-
-                # Check if the current row has class data
-                if title != "" and row.find("td", class_="table-element-text-align-start"):
-                    data = row.find_all("td")
-
-                    class_name = clean_string(data[0].text)
-                    overall_letter = clean_string(data[1].text)
-                    overall_percent = clean_number(data[2].text)
+                else:
+                    class_name, overall_letter, overall_percent, href = row
 
                     # Scrape links that lead to assignments
-                    if row.find("a"):
+                    if href:
                         url = "https://" + self.base_url + "/guardian/"
-                        url = url + row.find("a").get('href')
-                        self.scrape_class(url, semester_classes,
-                                          overall_percent,
-                                          overall_letter)
+                        url = url + href
+                        checkpointed = checkpoint.get_class(year, href) if checkpoint is not None else None
+                        if checkpointed is not None:
+                            semester_classes.append(checkpointed)
+                            continue
+                        scraped = self.attempt(self.scrape_class, url, semester_classes, overall_percent,
+                                               overall_letter)
+                        if scraped and checkpoint is not None:
+                            # A resumed import reads the class back as a dictionary, so it gets its catalog data now
+                            self.add_catalog_data(semester_classes[-1:])
+                            checkpoint.put_class(year, href, semester_classes[-1], wire_format)
+                        if scraped is None:
+                            # Without grades, the stored grades of the class are kept
+                            complete = False
+                            semester_classes.append(PowerSchoolClassGrade(class_name, False, overall_percent,
+                                                                          overall_letter, False, False, False))
                     else:
                         local_class = PowerSchoolClassGrade(class_name, False, overall_percent, overall_letter, False,
                                                             False, False)
-                        semester_classes.append(local_class.as_dict())
+                        semester_classes.append(local_class)
+
+            if interrupted:
+                self.partial = True
+                timed_out = True
+                break
 
             # Finalize data for the selected year
             if title != "":
                 year_data["S3" if title == "S0" else title] = semester_classes
+                self.add_catalog_data([local_class for classes in year_data.values() for local_class in classes])
                 all_history[year] = year_data
+                if finished and complete and cache is not None:
+                    cache.put(year, year_data, wire_format)
+                if complete and checkpoint is not None:
+                    checkpoint.put_year(year, year_data, wire_format)
                 scraped_term_count += 1
             else:
                 total_term_count -= 1
@@ -566,33 +1176,30 @@ class PowerschoolScraper(Scraper):
             self.progress = initial_progress + (max_progress - initial_progress) * scraped_term_count / (
                 1 if total_term_count == 0 else total_term_count)
 
-        if all_history == {}:
-            print(json_format(False, "No class data."))
+        if all_history == {} and not skipped_stored_term:
+            if self.failure is not None:
+                raise self.failure
+            self.emit(json_format(False, "No class data."))
         else:
-            print(json_format(True, all_history))
+            self.emit_result(all_history, history=True)
+            # Classes of the current year must be fetched again next time, even if some failed now
+            if not timed_out and checkpoint is not None:
+                checkpoint.clear()
 
     def get_present(self):
         """Uses a session to grab current semester grade data"""
         url = 'https://' + self.base_url + '/guardian/home.html'
-        resp = self.get_with_retries(url)
+        soup_resp = self.get_soup(url)
         self.progress = 35
         self.message = 'Searching for courses...'
-        soup_resp = bS(resp.text, "html.parser")
 
         # Begin organizing response data
         all_classes = []
 
-        # Main table on PowerSchool Home Page
-        main_table = soup_resp.find("table", class_='linkDescList grid')
+        home_classes = parse_home_classes(soup_resp)
+        self.discard(soup_resp)
 
-        # Extract only the rows of a class from the table
-        main_table_rows = main_table.find_all("tr")
-        class_rows = []
-        for row in main_table_rows:
-            if row.has_attr('class') and row['class'] == ['center']:
-                class_rows.append(row)
-
-        total_course_count = len(class_rows)
+        total_course_count = len(home_classes)
         scraped_course_count = 0
         initial_progress = self.progress
         max_progress = 90
@@ -600,54 +1207,12 @@ class PowerschoolScraper(Scraper):
         self.progress = initial_progress + (max_progress - initial_progress) * scraped_course_count / (
             1 if total_course_count == 0 else total_course_count)
 
-        # Iterate over each row and fetch data for that class
-        for class_row in class_rows:
-            assignments_link = None
-            overall_percent = None
-            overall_letter = None
-
-            # Get overall grade and the link to assignments page
-            links = class_row.find_all("a")
-            for link in links:
-                # If an overall grade is present, the link text is bold
-                # If no grade is present, then it is [ i ]
-                # Finally, check if it is actually a class grade link
-                # by checking the first five letters for "score"
-                if ((link.has_attr('class') and link['class'] == ['bold']) or link.text == '[ i ]') \
-                        and link['href'][:5] == 'score':
-
-                    # make sure it's not a quarter
-                    semester = str(link['href']).split('&fg=')[1][:2]
-                    if semester.startswith("Q"):
-                        continue
-
-                    assignments_link = link['href']
-
-                    # Split combined letter grade and percent text
-                    # into two separate values
-                    letter_and_percent = link.text
-                    if letter_and_percent == '[ i ]':
-                        overall_letter = False
-                        overall_percent = False
-                    else:
-                        for i, charac in enumerate(letter_and_percent):
-                            if str.isdigit(charac):
-                                overall_letter = letter_and_percent[:i]
-                                overall_percent = float(letter_and_percent[i:])
-                                break
+        # Leave time to fetch the term once the classes are done
+        self.start_phase(0.9, 'classes')
 
-            # Ensure link for assignments exists
-            if assignments_link is None:
-                total_course_count -= 1
-                self.message = 'Synced ' + str(scraped_course_count) + ' of ' + str(total_course_count) + ' courses...'
-                self.progress = initial_progress + (max_progress - initial_progress) * scraped_course_count / (
-                    1 if total_course_count == 0 else total_course_count)
-                continue
-
-            url = 'https://' + self.base_url + '/guardian/'
-            url = url + assignments_link
-            if (self.scrape_class(url, all_classes, overall_percent,
-                                  overall_letter)):
+        # Fetch data for each class
+        for scraped in self.scrape_classes(home_classes, all_classes):
+            if scraped:
                 scraped_course_count += 1
             else:
                 total_course_count -= 1
@@ -656,8 +1221,12 @@ class PowerschoolScraper(Scraper):
             self.progress = initial_progress + (max_progress - initial_progress) * scraped_course_count / (
                 1 if total_course_count == 0 else total_course_count)
 
+        if not all_classes and self.failure is not None:
+            raise self.failure
+
         # Fetch the current term and semester
         self.progress = 95
+        self.start_phase(1, 'term')
         term, semester = self.get_term_and_semester_data()
 
         if term is None or semester is None:
@@ -667,13 +1236,119 @@ class PowerschoolScraper(Scraper):
         if not all_classes:
             self.progress = 0
             self.message = 'No class data.'
-            print(json_format(False, "No class data."))
+            self.emit(json_format(False, "No class data."))
         else:
             # Add term and semester to the data
             self.progress = 100
             self.message = 'Sync Complete!'
+            self.add_catalog_data(all_classes)
             all_classes = {term: {semester: all_classes}}
-            print(json_format(True, all_classes))
+            self.emit_result(all_classes)
+
+    def scrape_classes(self, home_classes: list, all_classes: list):
+        """Scrapes the classes of the home page in order
+
+        Args:
+            home_classes: tuples from parse_home_classes
+            all_classes: list the scraped classes are added to
+
+        Yields:
+            For each class reached before the deadline, True if it was scraped,
+            False if it was skipped and None if it failed
+        """
+        if self.parse_pool is not None:
+            yield from self._scrape_classes_pipelined(home_classes, all_classes)
+            return
+
+        for assignments_link, overall_percent, overall_letter in home_classes:
+            if self.out_of_time():
+                self.partial = True
+                return
+
+            # Ensure link for assignments exists
+            if assignments_link is None:
+                yield False
+                continue
+
+            url = 'https://' + self.base_url + '/guardian/'
+            url = url + assignments_link
+            yield self.attempt(self.scrape_class, url, all_classes, overall_percent, overall_letter)
+
+    def _scrape_classes_pipelined(self, home_classes: list, all_classes: list):
+        """scrape_classes with every page parsed in the parse pool
+
+        Each page is parsed while the next one downloads. Between requests,
+        the pages that finished parsing get their assignments looked up and
+        the classes that finished parsing are yielded, so progress moves as
+        soon as the first class is done. Only the extracted data comes back
+        from the pool, and the classes are added in home page order.
+        """
+        classes = [None] * len(home_classes)
+        # Futures still being parsed, mapped to what they belong to
+        pages = {}
+        parsing = {}
+        for index, (assignments_link, overall_percent, overall_letter) in enumerate(home_classes):
+            if self.out_of_time():
+                self.partial = True
+                break
+            if assignments_link is None:
+                yield False
+                continue
+            url = 'https://' + self.base_url + '/guardian/' + assignments_link
+            page = self.attempt(self._submit_class_page, url)
+            if page is None:
+                yield None
+                continue
+            pages[page] = (index, url, overall_percent, overall_letter)
+            yield from self._look_up_pages(pages, parsing, classes, wait=False)
+
+        yield from self._look_up_pages(pages, parsing, classes, wait=True)
+        yield from self._finish_classes(parsing, classes, wait=True)
+        all_classes.extend(local_class for local_class in classes if local_class is not None)
+
+    def _look_up_pages(self, pages: dict, parsing: dict, classes: list, wait: bool):
+        """Requests the assignments of the parsed class pages, or waits for every page if wait is set"""
+        from concurrent.futures import as_completed
+
+        for page in as_completed(list(pages)) if wait else [page for page in pages if page.done()]:
+            index, url, overall_percent, overall_letter = pages.pop(page)
+            if self.out_of_time():
+                self.partial = True
+                pages.clear()
+                return
+            lookup = self.attempt(self._submit_lookup, url, page, overall_percent, overall_letter)
+            if lookup is None or lookup is False:
+                yield lookup
+            else:
+                parsing[lookup] = index
+            yield from self._finish_classes(parsing, classes, wait=False)
+
+    def _finish_classes(self, parsing: dict, classes: list, wait: bool):
+        """Yields for each parsed class, or waits for every class if wait is set"""
+        from concurrent.futures import as_completed
+
+        for future in as_completed(list(parsing)) if wait else [future for future in parsing if future.done()]:
+            index = parsing.pop(future)
+            classes[index] = self.attempt(future.result)
+            yield True if classes[index] is not None else None
+
+    def _submit_class_page(self, url: str) -> 'concurrent.futures.Future':
+        resp = self.get_with_retries(url, memo=False)
+        return self.parse_pool.submit(extract_class_page, resp.text)
+
+    def _submit_lookup(self, url: str, page: 'concurrent.futures.Future', overall_percent: float or bool,
+                       overall_letter: str) -> 'concurrent.futures.Future' or bool:
+        """Requests the assignments of a parsed class page and sends them to the parse pool
+
+        Returns:
+            The future of the parsed class, or False if the class is skipped like in scrape_class
+        """
+        class_name, teacher_name, section_id, student_id = page.result()
+        if not (class_name and teacher_name and overall_percent is not None and overall_letter is not None):
+            return False
+        local_class = PowerSchoolClassGrade(class_name, teacher_name, overall_percent, overall_letter, student_id,
+                                            section_id, False)
+        return self.parse_pool.submit(extract_ps_class, local_class, self.get_class(url, local_class).text)
 
     def scrape_class(self, url: str, all_classes: list, overall_percent: float or bool, overall_letter: str):
         """Scrapes data from a class assignments page
@@ -683,18 +1358,8 @@ class PowerschoolScraper(Scraper):
             overall_percent: Float
             overall_letter: Float
         """
-        grades_resp = self.get_with_retries(url)
-        grades_soup = bS(grades_resp.text, 'html.parser')
-
-        # The two tables in the page. info is top, grades is bottom
-        class_tables = grades_soup.find_all('table')
-        info_table = class_tables[0]
-
-        # Get teacher and class name
-        info_row = info_table.find_all('tr')[1]
-        info_data = info_row.find_all('td')
-        class_name = info_data[0].text
-        teacher_name = info_data[1].text
+        grades_soup = self.get_soup(url, memo=False)
+        class_name, teacher_name = parse_class_header(grades_soup)
 
         # Create a ClassGrade object to hold assignment data
         # Ensure all data is present, otherwise skip the class
@@ -702,25 +1367,22 @@ class PowerschoolScraper(Scraper):
             local_class = PowerSchoolClassGrade(class_name, teacher_name, overall_percent, overall_letter, None, None,
                                                 False)
         else:
+            self.discard(grades_soup)
             return False
 
-        # Get the Section ID for a class
-        wrapper = grades_soup.find('div', class_='xteContentWrapper')
-        section_id = wrapper.find('div')['data-sectionid']
-
-        # Get the Student ID for a class
-        student_id = wrapper['data-ng-init'].split(';')[0].split("'")[1][3:]
+        section_id, student_id = parse_class_ids(grades_soup)
 
         # Add student_id and section_id
         local_class.student_id = student_id
         local_class.section_id = section_id
+        self.discard(grades_soup)
 
         local_class = parse_ps_class(local_class, self.get_class(url, local_class))
 
         all_classes.append(local_class)
         return True
 
-    def get_class(self, url: str, local_class: PowerSchoolClassGrade) -> requests.Response:
+    def get_class(self, url: str, local_class: PowerSchoolClassGrade) -> 'requests.Response':
         headers = {
             'Connection': 'keep-alive',
             'authority': 'application/json, text/plain, */*',
@@ -752,15 +1414,20 @@ class PowerschoolScraper(Scraper):
                '],"start_date":' + start_date + ',"end_date":' + end_date + '} '
 
         url = 'https://' + self.base_url + '/ws/xte/assignment/lookup'
-        response = self.post_with_retries(url, headers=headers, params=params, data=data)
+        # The lookup only reads data, so memoized pages stay valid
+        response = self.post_with_retries(url, headers=headers, params=params, data=data, invalidate=False)
 
         return response
 
     def get_locked(self, class_data: list, term_data: dict) -> None:
+        from bs4 import Comment
+
+        if self.locked_lane is not None:
+            self.lane = self.locked_lane
         self.message = 'Fetching course data...'
         url = 'https://' + self.base_url + '/guardian/teachercomments.html'
-        response = self.get_with_retries(url)
-        soup = bS(response.text, 'html.parser')
+        # Not memoized since section id comments are extracted from the soup below
+        soup = self.get_soup(url, memo=False)
         table = soup.find('table', class_='grid linkDescList')
         courses = table.findChildren('tr')
         class_names = [course.findChildren('td')[2].text for course in courses[1:]]
@@ -776,8 +1443,7 @@ class PowerschoolScraper(Scraper):
             data_we_have = []
             self.message = 'Fetching student id...'
             url = 'https://' + self.base_url + '/guardian/forms.html'
-            response = self.get_with_retries(url)
-            soup = bS(response.text, 'html.parser')
+            soup = self.get_soup(url)
             student_id = str(soup.find('div', id='content-main').encode('utf-8')) \
                 .split('studentid')[1].split(',')[0].split('\\\'')[1].split('\\\'')[0]
 
@@ -827,6 +1493,8 @@ class PowerschoolScraper(Scraper):
                 raise Exception("Error getting term and semester data")
 
         class_data = new_class_data
+        self.discard(table)
+        self.discard(soup)
 
         # Begin organizing response data
         all_classes = []
@@ -839,6 +1507,10 @@ class PowerschoolScraper(Scraper):
             1 if total_course_count == 0 else total_course_count)
 
         for data in class_data:
+            if self.out_of_time():
+                self.partial = True
+                break
+
             class_name = data['class_name']
             teacher_name = data['teacher_name']
             overall_percent = data['overall_percent']
@@ -848,7 +1520,10 @@ class PowerschoolScraper(Scraper):
             local_class = PowerSchoolClassGrade(class_name, teacher_name, overall_percent, overall_letter, student_id,
                                                 section_id, True)
 
-            local_class = parse_ps_class(local_class, self.get_class('https://powerschool.bcp.org/', local_class))
+            local_class = self.attempt(self.scrape_locked_class, local_class)
+            if local_class is None:
+                total_course_count -= 1
+                continue
             all_classes.append(local_class)
             scraped_course_count += 1
             self.message = 'Synced ' + str(scraped_course_count) + ' of ' + str(total_course_count) + ' courses...'
@@ -863,18 +1538,23 @@ class PowerschoolScraper(Scraper):
         if len(all_classes) > 0:
             self.progress = 100
             self.message = 'Sync Complete!'
+            self.add_catalog_data(all_classes)
             all_classes = {term: {semester: all_classes}}
-            print(json_format(True, all_classes))
+            self.emit_result(all_classes)
         else:
+            if self.failure is not None:
+                raise self.failure
             self.progress = 0
             self.message = 'No class data.'
-            print(json_format(False, "No class data."))
+            self.emit(json_format(False, "No class data."))
+
+    def scrape_locked_class(self, local_class: PowerSchoolClassGrade) -> PowerSchoolClassGrade:
+        return parse_ps_class(local_class, self.get_class('https://powerschool.bcp.org/', local_class))
 
     def get_term_and_semester_data(self):
         self.message = 'Fetching term and semester data...'
         url = 'https://' + self.base_url + '/guardian/myschedulematrix.html'
-        resp = self.get_with_retries(url)
-        soup = bS(resp.text, "html.parser")
+        soup = self.get_soup(url)
 
         table = soup.find("table")
         if table is None:
@@ -903,7 +1583,124 @@ def clean(_soup) -> None:
     [t.decompose() for t in to_delete]
 
 
+def _cleaned_in_gradebook(span) -> bool:
+    for parent in span.parents:
+        classes = parent.get('class') or ()
+        if parent.name == 'span' and ('title' in classes or 'due-date' in classes):
+            return True
+        if parent.name == 'div' and 'gradebook-course-title' in classes:
+            return True
+        if parent.name == 'tr':
+            return 'category-row' in classes
+    return False
+
+
+def clean_gradebook(soup) -> None:
+    """Removes the visually-hidden spans of a Schoology gradebook in one pass
+
+    Only strips them from course titles, titles, due dates and category
+    rows, the elements scraped by their text. Grade columns of assignment
+    rows keep theirs, like when each element was cleaned on its own.
+    """
+    for span in soup.find_all('span', class_='visually-hidden'):
+        if _cleaned_in_gradebook(span):
+            span.decompose()
+
+
+class BasisAssignment:
+    """A single Schoology assignment, serialized without its sorting date"""
+
+    __slots__ = ('date', 'time', 'category', 'assignment_name', 'points_possible', 'points_gotten', 'psaid',
+                 'sort_date')
+
+    def __init__(self, date: str or None, time: str or None, category: str, assignment_name: str,
+                 points_possible: float or bool, points_gotten: float or bool, psaid: str,
+                 sort_date: float or None) -> None:
+        self.date = _intern(date)
+        self.time = _intern(time)
+        self.category = sys.intern(category)
+        self.assignment_name = _intern(assignment_name)
+        self.points_possible = points_possible
+        self.points_gotten = points_gotten
+        self.psaid = psaid
+        self.sort_date = sort_date
+
+    @property
+    def as_dict(self) -> dict:
+        return {
+            "date": self.date,
+            "time": self.time,
+            "category": self.category,
+            "assignment_name": self.assignment_name,
+            "points_possible": self.points_possible,
+            "points_gotten": self.points_gotten,
+            "psaid": self.psaid
+        }
+
+
+class TermCalendar:
+    """Start dates of the terms in each school year
+
+    Loaded from basis_terms.json, which maps a school year like "23-24"
+    to its terms and the date each one starts on, e.g.
+    {"23-24": {"T1": "08/16/2023", "T2": "12/01/2023", "T3": "03/04/2024"}}
+
+    A year missing from the calendar raises a LookupError instead of
+    guessing, since putting its assignments in the wrong terms would go
+    unnoticed. Each new school year has to be added before it starts.
+    """
+
+    def __init__(self, years: dict) -> None:
+        self._terms = {}
+        self._starts = {}
+        for year, terms in years.items():
+            starts = sorted((datetime.strptime(start, "%m/%d/%Y").timestamp(), name) for name, start in terms.items())
+            self._terms[year] = [name for _, name in starts]
+            self._starts[year] = [start for start, _ in starts]
+
+    @classmethod
+    def load(cls, path: str) -> 'TermCalendar':
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls({})
+
+    def terms(self, year: str) -> list:
+        """Returns the names of the terms in a school year in order
+
+        Raises:
+            LookupError: if the year is not in the calendar
+        """
+        if year not in self._terms:
+            raise LookupError(f"No Basis term dates for {year}, add them to {os.path.basename(basis_terms_file)}")
+        return self._terms[year]
+
+    def split(self, year: str, grades: list) -> list:
+        """Splits assignments into the terms of a school year
+
+        Args:
+            year: school year like "23-24"
+            grades: assignments with undated ones first and the rest sorted by sort_date
+
+        Returns:
+            A list of (term name, assignments) pairs. Undated assignments
+            and those before the second term belong to the first term.
+
+        Raises:
+            LookupError: if the year is not in the calendar
+        """
+        names = self.terms(year)
+        starts = self._starts[year]
+        sort_dates = [assignment.sort_date for assignment in grades]
+        dated = next((i for i, sort_date in enumerate(sort_dates) if sort_date is not None), len(grades))
+        bounds = [0] + [bisect_left(sort_dates, start, dated) for start in starts[1:]] + [len(grades)]
+        return [(name, grades[bounds[i]:bounds[i + 1]]) for i, name in enumerate(names)]
+
+
 class BasisClassGrade:
+    __slots__ = ('class_name', 'overall_percent', 'grades')
+
     def __init__(self, class_name: str, overall_percent: str, grades: list) -> None:
         self.class_name = class_name
         self.overall_percent = overall_percent
@@ -914,35 +1711,122 @@ class BasisClassGrade:
         return {
             "class_name": self.class_name,
             "overall_percent": self.overall_percent,
-            "grades": self.grades
+            "grades": [assignment.as_dict for assignment in self.grades]
         }
 
 
 class BasisWeights:
     def __init__(self) -> None:
-        self._weights = []
+        # Keyed by class name, kept in the order classes were added
+        self._weights = {}
 
     @property
     def as_list(self) -> list:
-        return self._weights
+        return list(self._weights.values())
 
-    def add_class(self, class_name: str) -> None:
-        if len([class_ for class_ in self._weights if class_["className"] == class_name]) == 0:
-            self._weights.append({"className": class_name, "weights": {}, "hasWeights": False})
+    def add_class(self, class_name: str) -> dict:
+        if class_name not in self._weights:
+            self._weights[class_name] = {"className": class_name, "weights": {}, "hasWeights": False}
+        return self._weights[class_name]
 
-    def add_weight(self, class_name: str, weight_name: str, weight_value: float):
-        self.add_class(class_name)
+    def update(self, other: 'BasisWeights') -> None:
+        """Adds the classes and weights of other, after the classes already added"""
+        for class_name, class_weights in other._weights.items():
+            for weight_name, weight_value in class_weights["weights"].items():
+                self.add_weight(class_name, weight_name, weight_value)
+            self.add_class(class_name)
 
-        exists = next((weight for weight in self._weights if weight['className'] == class_name), None)
-        if exists is None:
-            self._weights.append({"className": class_name, "weights": {}, "hasWeights": False})
-            index = len(self._weights) - 1
-        else:
-            index = self._weights.index(exists)
+    def add_weight(self, class_name: str, weight_name: str, weight_value: float):
+        class_weights = self.add_class(class_name)
 
-        self._weights[index]["weights"][weight_name] = weight_value
+        class_weights["weights"][weight_name] = weight_value
         if weight_value is not None:
-            self._weights[index]["hasWeights"] = True
+            class_weights["hasWeights"] = True
+
+
+def index_rows_by_parent(table) -> dict:
+    """Groups the assignment rows of a Schoology course table by category
+
+    Walks the table once and maps each data-parent-id to the rows under
+    it, in document order. Category rows are left out since nested
+    categories are visited as categories themselves.
+    """
+    rows_by_parent = {}
+    for row in table.find_all('tr', attrs={'data-parent-id': True}):
+        if 'category-row' in row.get('class', ()):
+            continue
+        rows_by_parent.setdefault(row['data-parent-id'], []).append(row)
+    return rows_by_parent
+
+
+def parse_basis_categories(grades_soup, class_name: str, weights: 'BasisWeights') -> list:
+    """Extracts the weights and assignments of a Schoology course table
+
+    Args:
+        grades_soup: the course's presentation table, already passed through clean_gradebook()
+        class_name: name the weights are recorded under
+        weights: BasisWeights that category weights are added to
+
+    Returns:
+        A list of BasisAssignment records in page order
+    """
+    rows_by_parent = index_rows_by_parent(grades_soup)
+    categories_soup = grades_soup.find_all('tr', class_='category-row')
+    grades = []
+    for category_soup in categories_soup:
+        category_name = category_soup.find('span', class_='title')
+        if category_name is None:
+            continue
+
+        category_name = clean_string(category_name.text)
+
+        category_value = category_soup.find('span', class_='percentage-contrib')
+
+        if category_value is not None:
+            category_value = clean_number(category_value.text[1:-2])
+        category_id = category_soup['data-id']
+
+        if category_name is not False:
+            weights.add_weight(class_name, category_name, category_value)
+            for assignment_soup in rows_by_parent.get(category_id, ()):
+                assignment_id = assignment_soup['data-id']
+
+                assignment_name_soup = assignment_soup.find('span', class_='title')
+                assignment_name = assignment_name_soup.text
+
+                assignment_date_time_soup = assignment_soup.find('span', class_='due-date')
+                if assignment_date_time_soup is not None:
+                    date_time = assignment_date_time_soup.text
+                    if ' ' not in date_time:
+                        date_time += " 12:00am"
+
+                    date, time = date_time.split(' ')
+                    sort_date = datetime.strptime(date_time, "%m/%d/%y %I:%M%p").timestamp()
+                else:
+                    date = None
+                    time = None
+                    sort_date = None
+
+                assignment_grade_soup = assignment_soup.find('td', class_='grade-column')
+
+                points_gotten_soup = assignment_grade_soup.find('span', class_='rounded-grade')
+                if points_gotten_soup is not None and points_gotten_soup.has_attr('title'):
+                    points_gotten = clean_number(points_gotten_soup['title'])
+                else:
+                    points_gotten = False
+
+                points_possible_soup = assignment_grade_soup.find('span', class_='max-grade')
+                if points_possible_soup is not None:
+                    points_possible = clean_number(points_possible_soup.text[3:])
+                else:
+                    points_possible = False
+
+                assignment = BasisAssignment(date, time, category_name, assignment_name, points_possible,
+                                             points_gotten, assignment_id, sort_date)
+
+                grades.append(assignment)
+
+    return grades
 
 
 class BasisScraper(Scraper):
@@ -972,7 +1856,7 @@ class BasisScraper(Scraper):
         resp = self.post_with_retries(url, headers=headers, data=payload, allow_redirects=False)
         if len(resp.cookies) == 0:
             self.progress = 0
-            print(json_format(False, "Incorrect login details."))
+            self.emit(json_format(False, "Incorrect login details."))
             sys.exit()
 
         self.progress = 5
@@ -999,19 +1883,20 @@ class BasisScraper(Scraper):
         self.progress = 20
         self.message = 'Searching for courses...'
 
-        soup = bS(resp.text, 'html.parser')
+        soup = parse_html(resp.text)
+        self.check_memory()
+        # Strip screen reader text from the gradebook once instead of per element
+        clean_gradebook(soup)
 
         classes = soup.find_all('div', class_="gradebook-course")
 
-        all_classes = {"T1": [], "T2": [], "T3": []}
+        all_classes = {}
         weights = BasisWeights()
         term = None
-        t1_start_dict = {"23-24": datetime.strptime("08/16/2023 12:00AM", "%m/%d/%Y %I:%M%p").timestamp()}
-        t2_start_dict = {"23-24": datetime.strptime("12/01/2023 12:00AM", "%m/%d/%Y %I:%M%p").timestamp()}
-        t3_start_dict = {"23-24": datetime.strptime("03/04/2024 12:00AM", "%m/%d/%Y %I:%M%p").timestamp()}
+        calendar = TermCalendar.load(basis_terms_file)
 
-        has_t2 = False
-        has_t3 = False
+        # Index of the last trimester any class has assignments in
+        last_trimester = 0
 
         total_course_count = len(classes)
         scraped_course_count = 0
@@ -1023,7 +1908,6 @@ class BasisScraper(Scraper):
 
         for class_ in classes:
             class_name_soup = class_.find('div', class_='gradebook-course-title')
-            clean(class_name_soup)
             class_name = class_name_soup.text
             class_name = clean_string(class_name)
 
@@ -1034,8 +1918,6 @@ class BasisScraper(Scraper):
                     1 if total_course_count == 0 else total_course_count)
                 continue
 
-            weights.add_class(class_name)
-
             grades_soup = class_.find('div', class_='gradebook-course-grades')
             overall_grade_soup = grades_soup.find('span', class_='numeric-grade primary-grade')
             if overall_grade_soup is None:
@@ -1046,148 +1928,154 @@ class BasisScraper(Scraper):
 
             grades_soup = grades_soup.find('table', role='presentation')
             term_soup = grades_soup.find('tr', class_='period-row').find('span', class_='title')
-            clean(term_soup)
             if term is None:
                 term = '-'.join(list(map(lambda t: t[-2:], term_soup.text.split(' - '))))
                 term = clean_string(term)
 
-            categories_soup = grades_soup.find_all('tr', class_='category-row')
-            grades = []
-            for category_soup in categories_soup:
-                clean(category_soup)
-                category_name = category_soup.find('span', class_='title')
-                if category_name is None:
-                    continue
+            # Weights are only kept once the whole class parsed, so a failed class leaves none behind
+            class_weights = BasisWeights()
+            class_weights.add_class(class_name)
+            grades = self.attempt(parse_basis_categories, grades_soup, class_name, class_weights)
+            if grades is None:
+                total_course_count -= 1
+                continue
+            weights.update(class_weights)
+
+            # Assignments without a due date go first in page order, the rest by date
+            grades.sort(key=lambda j: (j.sort_date is not None, j.sort_date or 0))
 
-                category_name = clean_string(category_name.text)
-
-                category_value = category_soup.find('span', class_='percentage-contrib')
-
-                if category_value is not None:
-                    category_value = clean_number(category_value.text[1:-2])
-                category_id = category_soup['data-id']
-
-                if category_name is not False:
-                    weights.add_weight(class_name, category_name, category_value)
-                    assignments_soup = grades_soup.find_all('tr', {'data-parent-id': category_id})
-                    for assignment_soup in assignments_soup:
-                        assignment_id = assignment_soup['data-id']
-
-                        assignment_name_soup = assignment_soup.find('span', class_='title')
-                        clean(assignment_name_soup)
-                        assignment_name = assignment_name_soup.text
-
-                        assignment_date_time_soup = assignment_soup.find('span', class_='due-date')
-                        if assignment_date_time_soup is not None:
-                            clean(assignment_date_time_soup)
-                            date_time = assignment_date_time_soup.text
-                            if ' ' not in date_time:
-                                date_time += " 12:00am"
-
-                            date, time = date_time.split(' ')
-                            sort_date = datetime.strptime(date_time, "%m/%d/%y %I:%M%p").timestamp()
-                        else:
-                            date = None
-                            time = None
-                            sort_date = None
-
-                        assignment_grade_soup = assignment_soup.find('td', class_='grade-column')
-
-                        points_gotten_soup = assignment_grade_soup.find('span', class_='rounded-grade')
-                        if points_gotten_soup is not None and points_gotten_soup.has_attr('title'):
-                            points_gotten = clean_number(points_gotten_soup['title'])
-                        else:
-                            points_gotten = False
-
-                        points_possible_soup = assignment_grade_soup.find('span', class_='max-grade')
-                        if points_possible_soup is not None:
-                            points_possible = clean_number(points_possible_soup.text[3:])
-                        else:
-                            points_possible = False
-
-                        assignment = {"date": date, "time": time, "category": category_name,
-                                      "assignment_name": assignment_name, "points_possible": points_possible,
-                                      "points_gotten": points_gotten,
-                                      "psaid": assignment_id, 'sort_date': sort_date}
-
-                        grades.append(assignment)
-
-            no_due_date = list(filter(lambda j: j['sort_date'] is None, grades))
-            no_due_date.reverse()
-            due_date = list(filter(lambda j: j['sort_date'] is not None, grades))
-            grades = sorted(due_date, key=lambda j: j['sort_date'])
-            [grades.insert(0, item) for item in no_due_date]
-
-            t1_grades = [{key: value for key, value in assignment.items() if key != 'sort_date'} for assignment in
-                         grades if
-                         (assignment['sort_date'] is None or assignment['sort_date'] < t2_start_dict[term])]
-            t2_grades = [{key: value for key, value in assignment.items() if key != 'sort_date'} for assignment in
-                         grades if (assignment['sort_date'] is not None and t2_start_dict[term] <= assignment[
-                    'sort_date'] < t3_start_dict[term])]
-            t3_grades = [{key: value for key, value in assignment.items() if key != 'sort_date'} for assignment in
-                         grades if
-                         (assignment['sort_date'] is not None and assignment['sort_date'] >= t3_start_dict[term])]
-
-            if len(t2_grades) > 0:
-                has_t2 = True
-            if len(t3_grades) > 0:
-                has_t3 = True
-
-            all_classes["T1"].append(BasisClassGrade(class_name, overall_grade, t1_grades).as_dict)
-            all_classes["T2"].append(BasisClassGrade(class_name, overall_grade, t2_grades).as_dict)
-            all_classes["T3"].append(BasisClassGrade(class_name, overall_grade, t3_grades).as_dict)
+            for i, (trimester, trimester_grades) in enumerate(calendar.split(term, grades)):
+                if len(trimester_grades) > 0:
+                    last_trimester = max(last_trimester, i)
+                all_classes.setdefault(trimester, []).append(BasisClassGrade(class_name, overall_grade,
+                                                                             trimester_grades))
+            self.discard(class_)
+            self.check_memory()
 
             scraped_course_count += 1
             self.message = 'Synced ' + str(scraped_course_count) + ' of ' + str(total_course_count) + ' courses...'
             self.progress = initial_progress + (max_progress - initial_progress) * scraped_course_count / (
                 1 if total_course_count == 0 else total_course_count)
+        self.discard(soup)
+
+        if not all_classes and self.failure is not None:
+            raise self.failure
 
         if term is not None:
-            trimesters = ["T1"]
-            if has_t2 or has_t3: trimesters.append("T2")
-            if has_t3: trimesters.append("T3")
+            trimesters = calendar.terms(term)[:last_trimester + 1]
             self.message = 'Sync Complete!'
             ret_weights = {term: {}}
             ret_classes = {term: {}}
             for trimester in trimesters:
                 ret_weights[term][trimester] = weights.as_list
                 ret_classes[term][trimester] = all_classes[trimester]
-            print(json_format(True, ret_classes, ret_weights))
+            self.emit_result(ret_classes, ret_weights)
         else:
-            print(json_format(False, "No class data."))
+            self.emit(json_format(False, "No class data."))
 
 
-if __name__ == "__main__":
-    school: str = input()
-    user: str = input()
-    password: str = input()
+def sync_account(school: str, user: str, password: str, data_if_locked: list or None = None,
+                 term_data_if_locked: dict or None = None, get_history: bool = False, emit=print,
+                 session: 'requests.Session' or None = None, stored_terms: set or None = None,
+                 **scraper_options) -> None:
+    """Logs into one account and scrapes it
+
+    Progress and the final result are passed to emit as JSON lines. A
+    failed login still calls sys.exit() after emitting its result.
+    stored_terms are the history years the caller already has. Other
+    keyword arguments, like a deadline, are passed on to the scraper.
+    """
+    # Fail without loading requests or bs4 when the login cannot succeed
+    if not user.strip() or not password:
+        emit(json_format(False, "Incorrect login details."))
+        sys.exit()
+
     if school == "basis":
-        bs = BasisScraper()
+        bs = BasisScraper(emit, session, **scraper_options)
         try:
+            bs.start_phase(0.3, 'login')
             if bs.login(user, password):
+                bs.start_phase(1, 'present')
                 bs.get_present()
-        except requests.Timeout:
-            print(json_format(False, "Could not connect to Schoology."))
+        except MemoryLimitExceeded as e:
+            emit(json_format(False, str(e), error=e.as_dict()))
+        except DeadlineExceeded as e:
+            emit(json_format(False, str(e)))
         except Exception as e:
-            # Error when something in Schoology breaks scraper
-            print(json_format(False, f"Error: {str(e)}"))
-            sys.exit()
+            if is_timeout(e):
+                emit(json_format(False, "Could not connect to Schoology."))
+            else:
+                # Error when something in Schoology breaks scraper
+                emit(json_format(False, f"Error: {str(e)}"))
     else:
-        data_if_locked: dict = json.loads(input())  # arg must be stringified json
-        term_data_if_locked: dict = json.loads(input())  # arg must be stringified json
-        get_history: str = input()
-        ps = PowerschoolScraper(school)
+        ps = PowerschoolScraper(school, emit, session, **scraper_options)
         try:
-            if ps.login(user, password):
-                if get_history in ['true', 'True', '1']:
-                    ps.get_history()
+            ps.start_phase(0.3, 'login')
+            logged_in = ps.login(user, password)
+            ps.start_phase(1, ('history' if get_history else 'present') if logged_in else 'locked')
+            if logged_in:
+                if get_history:
+                    ps.get_history(stored_terms, TermCache.for_user(school, user),
+                                   HistoryCheckpoint.for_user(school, user))
                 else:
                     ps.get_present()
             else:
                 ps.get_locked(data_if_locked, term_data_if_locked)
-        except requests.Timeout:
-            print(json_format(False, "Could not connect to PowerSchool."))
+        except MemoryLimitExceeded as e:
+            emit(json_format(False, str(e), error=e.as_dict()))
+        except DeadlineExceeded as e:
+            emit(json_format(False, str(e)))
         except Exception as e:
-            # Error when something in PowerSchool breaks scraper
-            print(json_format(False, f"Error: {str(traceback.format_exc())}"))
-            sys.exit()
+            if is_timeout(e):
+                emit(json_format(False, "Could not connect to PowerSchool."))
+            else:
+                # Error when something in PowerSchool breaks scraper
+                emit(json_format(False, f"Error: {str(traceback.format_exc())}"))
+
+
+if __name__ == "__main__":
+    # Optional time budget for the whole sync in seconds, e.g. --deadline 60
+    options = {}
+    if "--deadline" in sys.argv:
+        options['deadline'] = Deadline(float(sys.argv[sys.argv.index("--deadline") + 1]))
+    # Optionally return the classes that were scraped when others fail or time runs out, e.g. --partial
+    if "--partial" in sys.argv:
+        options['partial_results'] = True
+    # Optional lookup table written by catalog_to_json.py, e.g. --catalog catalog_lookup.bin
+    catalog_path = sys.argv[sys.argv.index("--catalog") + 1] if "--catalog" in sys.argv else None
+    # Optional Graderoom username to write the grades to MongoDB for, e.g. --mongo username
+    if "--mongo" in sys.argv:
+        from mongo_sink import MongoSink
+        options['sink'] = MongoSink.from_env(sys.argv[sys.argv.index("--mongo") + 1])
+    # Optional low memory mode and memory ceiling in MiB, e.g. --low-memory --memory-limit 256
+    if "--low-memory" in sys.argv:
+        options['low_memory'] = True
+    if "--memory-limit" in sys.argv:
+        options['memory_limit'] = float(sys.argv[sys.argv.index("--memory-limit") + 1])
+    # Optional processes to parse class pages in while the next ones download, e.g. --parse-workers 2
+    if "--parse-workers" in sys.argv:
+        from concurrent.futures import ProcessPoolExecutor
+        options['parse_pool'] = ProcessPoolExecutor(int(sys.argv[sys.argv.index("--parse-workers") + 1]))
+    # Optional running-grade series for the charts, e.g. --series. The last series and then the user's stored
+    # weights and addedWeights are read as two more lines of stdin
+    read_series = "--series" in sys.argv
+
+    school: str = input()
+    user: str = input()
+    password: str = input()
+    if school == "basis":
+        if read_series:
+            options['series'] = json.loads(input())  # arg must be stringified json
+            options['series_weights'] = json.loads(input())  # arg must be stringified json
+        sync_account(school, user, password, **options)
+    else:
+        data_if_locked: dict = json.loads(input())  # arg must be stringified json
+        term_data_if_locked: dict = json.loads(input())  # arg must be stringified json
+        get_history: str = input()
+        if read_series:
+            options['series'] = json.loads(input())  # arg must be stringified json
+            options['series_weights'] = json.loads(input())  # arg must be stringified json
+        if catalog_path is not None:
+            options['catalog'] = CatalogLookup(catalog_path)
+        sync_account(school, user, password, data_if_locked, term_data_if_locked,
+                     get_history in ['true', 'True', '1'], **options)
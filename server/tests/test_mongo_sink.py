@@ -0,0 +1,211 @@
+"""Checks that MongoSink stores results in the user's document like dbClient.js
+
+Runs against the MongoDB at TEST_DB_URL (mongodb://localhost:27017 by
+default) in a throwaway database. When none is reachable, the tests run
+against FakeDatabase, which implements the few collection methods and
+update operators the sink uses.
+
+Usage: python -m unittest discover server/tests
+"""
+import copy
+import os
+import sys
+import unittest
+import uuid
+from types import SimpleNamespace
+
+# Tests import the modules that live one directory up
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from mongo_sink import MongoSink, shard
+
+test_db_url = os.getenv("TEST_DB_URL", "mongodb://localhost:27017")
+
+
+def _client() -> MongoClient or None:
+    try:
+        client = MongoClient(test_db_url, serverSelectionTimeoutMS=500)
+        client.admin.command('ping')
+        return client
+    except PyMongoError:
+        return None
+
+
+client = _client()
+
+
+class FakeCollection:
+    def __init__(self) -> None:
+        self.documents = []
+
+    def _find(self, query: dict) -> dict or None:
+        return next((document for document in self.documents
+                     if all(document.get(key) == value for key, value in query.items())), None)
+
+    def insert_one(self, document: dict) -> None:
+        self.documents.append(copy.deepcopy(document))
+
+    def find_one(self, query: dict, projection: dict or None = None) -> dict or None:
+        # Returns the whole document, the sink only reads the fields it projected
+        return copy.deepcopy(self._find(query))
+
+    def update_one(self, query: dict, update: dict) -> SimpleNamespace:
+        document = self._find(query)
+        before = copy.deepcopy(document)
+        for path, value in update.get('$set', {}).items():
+            *parents, key = path.split('.')
+            target = document
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[key] = copy.deepcopy(value)
+        for operator in ('$push', '$addToSet'):
+            for path, value in update.get(operator, {}).items():
+                *parents, key = path.split('.')
+                target = document
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                values = target.setdefault(key, [])
+                for item in value['$each'] if isinstance(value, dict) and '$each' in value else [value]:
+                    if operator == '$push' or item not in values:
+                        values.append(copy.deepcopy(item))
+        return SimpleNamespace(modified_count=int(document != before))
+
+
+class FakeDatabase:
+    def __init__(self) -> None:
+        self.name = "fake"
+        self.collections = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        return self.collections.setdefault(name, FakeCollection())
+
+
+def ps_class(name: str, *psaids) -> dict:
+    return {'class_name': name, 'teacher_name': "Teacher", 'overall_percent': 90.0, 'overall_letter': "A",
+            'student_id': "1", 'section_id': name, 'ps_locked': False,
+            'grades': [{'psaid': psaid, 'category': "Tests", 'points_gotten': 9, 'points_possible': 10}
+                       for psaid in psaids]}
+
+
+def basis_class(name: str, *psaids) -> dict:
+    return {'class_name': name, 'grades': [{'psaid': psaid, 'category': "Tests", 'points_gotten': 9,
+                                            'points_possible': 10} for psaid in psaids]}
+
+
+def basis_weights(name: str) -> dict:
+    return {'className': name, 'hasWeights': True, 'weights': {"Tests": 100}}
+
+
+class MongoSinkTest(unittest.TestCase):
+    def setUp(self) -> None:
+        if client is not None:
+            self.database = client[f"graderoom_sink_test_{uuid.uuid4().hex[:8]}"]
+        else:
+            self.database = FakeDatabase()
+        self.username = "sinkuser"
+        self.users = self.database[f"users_{shard(self.username)}"]
+        self.sink = MongoSink(self.database, "SinkUser")
+
+    def tearDown(self) -> None:
+        if client is not None:
+            client.drop_database(self.database.name)
+
+    def insert_user(self, grades: dict, weights: dict or None = None) -> None:
+        self.users.insert_one({'username': self.username, 'grades': grades, 'weights': weights or {},
+                               'alerts': {'lastUpdated': []}})
+
+    def stored(self) -> dict:
+        return self.users.find_one({'username': self.username})
+
+    def test_present_replaces_semester(self) -> None:
+        self.insert_user({"24-25": {"S1": [ps_class("Old", 1)], "S2": [ps_class("Math", 2), ps_class("Gone", 3)]}})
+        summary = self.sink.write({"24-25": {"S2": [ps_class("Math", 2, 4)]}})
+        user = self.stored()
+        self.assertEqual(user['grades']["24-25"]["S2"], [ps_class("Math", 2, 4)])
+        self.assertEqual(user['grades']["24-25"]["S1"], [ps_class("Old", 1)])
+        self.assertEqual(summary, {'classes': 1, 'assignments': 2, 'modified': 1})
+        [update] = user['alerts']['lastUpdated']
+        self.assertEqual(update['changeData'], {'added': {"Math": [4]}, 'modified': {}, 'removed': {}, 'overall': {}})
+        self.assertIs(update['ps_locked'], False)
+        self.assertEqual(user['updatedInBackground'], "complete")
+        self.assertEqual(user['pendingClassUpdates'], [{'term': "24-25", 'semester': "S2"}])
+
+    def test_present_initializes_class_data(self) -> None:
+        # Every class of the term gets the entries the user page indexes, like after Node's init* helpers
+        self.insert_user({"24-25": {"S1": [ps_class("Old", 1)]}})
+        self.sink.write({"24-25": {"S2": [ps_class("Math", 2), ps_class("Art")]}})
+        user = self.stored()
+        self.assertEqual(user['weights']["24-25"], {
+            "S1": [{'className': "Old", 'weights': {"Tests": None}, 'hasWeights': False}],
+            "S2": [{'className': "Math", 'weights': {"Tests": None}, 'hasWeights': False},
+                   {'className': "Art", 'weights': {}, 'hasWeights': False}]})
+        self.assertEqual(user['addedWeights']["24-25"]["S2"], [{'className': "Math", 'weights': {}},
+                                                               {'className': "Art", 'weights': {}}])
+        self.assertEqual(user['addedAssignments']["24-25"]["S2"], [{'className': "Math", 'data': []},
+                                                                   {'className': "Art", 'data': []}])
+        self.assertEqual(user['editedAssignments']["24-25"]["S2"], [{'className': "Math", 'data': {}},
+                                                                    {'className': "Art", 'data': {}}])
+
+    def test_present_drops_edits_of_removed_assignments(self) -> None:
+        self.insert_user({"24-25": {"S1": [ps_class("Math", 1, 2)]}})
+        self.users.update_one({'username': self.username}, {'$set': {'editedAssignments': {"24-25": {"S1": [
+            {'className': "Math", 'data': {"1": {'points_gotten': 10}, "2": {'points_gotten': 8}}}]}}}})
+        self.sink.write({"24-25": {"S1": [ps_class("Math", 1)]}})
+        user = self.stored()
+        self.assertEqual(user['editedAssignments']["24-25"]["S1"],
+                         [{'className': "Math", 'data': {"1": {'points_gotten': 10}}}])
+        self.assertEqual(user['alerts']['lastUpdated'][-1]['changeData']['removed'],
+                         {"Math": [{'psaid': 2, 'category': "Tests", 'points_gotten': 9, 'points_possible': 10}]})
+
+    def test_partial_keeps_missing_classes(self) -> None:
+        self.insert_user({"24-25": {"S1": [ps_class("Math", 1), ps_class("History", 2)]}})
+        self.sink.write({"24-25": {"S1": [ps_class("Math", 1, 3)]}}, partial=True)
+        self.assertEqual(self.stored()['grades']["24-25"]["S1"], [ps_class("Math", 1, 3), ps_class("History", 2)])
+
+    def test_basis_sets_term_and_weights(self) -> None:
+        self.insert_user({"23-24": {"T1": [basis_class("Art", 1)]}, "24-25": {"T1": [basis_class("Old", 2)]}},
+                         {"24-25": {"T1": [basis_weights("Old")]}})
+        grades = {"24-25": {"T1": [basis_class("Art", 3)], "T2": [basis_class("Art", 4)]}}
+        weights = {"24-25": {"T1": [basis_weights("Art")], "T2": [basis_weights("Art")]}}
+        self.sink.write(grades, weights)
+        user = self.stored()
+        self.assertEqual(user['grades']["24-25"], grades["24-25"])
+        self.assertEqual(user['weights']["24-25"], weights["24-25"])
+        self.assertEqual(user['grades']["23-24"], {"T1": [basis_class("Art", 1)]})
+
+    def test_basis_partial_keeps_missing_classes_and_weights(self) -> None:
+        self.insert_user({"24-25": {"T1": [basis_class("Art", 1), basis_class("Music", 2)]}},
+                         {"24-25": {"T1": [basis_weights("Art"), basis_weights("Music")]}})
+        self.sink.write({"24-25": {"T1": [basis_class("Art", 3)]}}, {"24-25": {"T1": [basis_weights("Art")]}},
+                        partial=True)
+        user = self.stored()
+        self.assertEqual(user['grades']["24-25"]["T1"], [basis_class("Art", 3), basis_class("Music", 2)])
+        self.assertEqual(user['weights']["24-25"]["T1"], [basis_weights("Art"), basis_weights("Music")])
+
+    def test_history_keeps_stored_assignments(self) -> None:
+        old = ps_class("Math", 1, 2)
+        self.insert_user({"23-24": {"S1": [old]}})
+        empty = dict(ps_class("Math"), teacher_name=False)
+        self.sink.write({"22-23": {"S1": [ps_class("Bio", 5)]}, "23-24": {"S1": [empty], "S2": [ps_class("Art", 6)]}},
+                        history=True)
+        user = self.stored()
+        self.assertEqual(user['grades']["22-23"], {"S1": [ps_class("Bio", 5)]})
+        self.assertEqual(user['grades']["23-24"]["S1"], [old])
+        self.assertEqual(user['grades']["23-24"]["S2"], [ps_class("Art", 6)])
+        self.assertEqual(user['updatedGradeHistory'], [user['alerts']['lastUpdated'][-1]['timestamp']])
+        self.assertEqual(user['pendingClassUpdates'], [{'term': "22-23", 'semester': "S1"},
+                                                       {'term': "23-24", 'semester': "S1"},
+                                                       {'term': "23-24", 'semester': "S2"}])
+
+    def test_missing_user(self) -> None:
+        with self.assertRaises(LookupError):
+            self.sink.write({"24-25": {"S1": [ps_class("Math", 1)]}})
+
+
+if __name__ == '__main__':
+    unittest.main()